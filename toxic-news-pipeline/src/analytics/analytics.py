@@ -4,10 +4,14 @@ Analyse tous les articles collectés et stocke les résultats de prédiction.
 """
 
 import os
+import argparse
 from datetime import datetime, timezone
+from functools import partial
 from typing import Dict, Optional
 from pymongo import MongoClient
+from src.storage.bulk import BulkWriter, INSERTED, MATCHED
 from src.models.classifier import ToxicityClassifier  # Import direct du classifieur validé
+from src.models.cache import build_prediction_cache
 
 # ============================================================================ 
 # CONFIGURATION
@@ -22,6 +26,13 @@ class PredictorConfig:
     ARTICLES_COLLECTION = "articles"
     PREDICTIONS_COLLECTION = "predictions"
 
+    # Nombre d'articles envoyés ensemble au classifieur
+    CHUNK_SIZE = int(os.getenv("PREDICTOR_CHUNK_SIZE", "64"))
+    # Documents rapatriés par aller-retour du curseur MongoDB
+    CURSOR_BATCH_SIZE = int(os.getenv("PREDICTOR_CURSOR_BATCH_SIZE", "500"))
+    # Seuls champs lus dans la collection articles (_id inclus par défaut)
+    ARTICLE_FIELDS = {"url": 1, "title": 1, "content": 1, "site": 1, "duplicate_of": 1}
+
 # ============================================================================ 
 # SERVICE DE PRÉDICTION
 # ============================================================================
@@ -41,7 +52,7 @@ class ToxicityPredictor:
 
         # Initialise le classifieur
         print("Chargement du modèle de toxicité...")
-        self.classifier = ToxicityClassifier()
+        self.classifier = ToxicityClassifier(cache=build_prediction_cache())
         print("Modèle prêt\n")
 
     def _create_indexes(self):
@@ -50,6 +61,7 @@ class ToxicityPredictor:
             self.predictions.create_index("url", unique=True)
             self.predictions.create_index("predicted_at")
             self.predictions.create_index("site")
+            self.articles.create_index("fetched_at")
         except Exception as e:
             print(f"⚠ Warning index creation: {e}")
 
@@ -65,6 +77,7 @@ class ToxicityPredictor:
             "prediction": result["prediction"],
             "confidence": result["confidence"],
             "toxicity_level": result["toxicity_level"],
+            "model_version": self.classifier.model_version,
             "predicted_at": datetime.now(timezone.utc)
         }
 
@@ -75,20 +88,55 @@ class ToxicityPredictor:
         except Exception as e:
             return {"success": False, "error": str(e), "prediction": prediction_doc}
 
-    def predict_all_articles(self):
-        """Analyse tous les articles et stocke les prédictions."""
-        print("=== Analyse de toxicité de tous les articles ===\n")
+    def _articles_to_score(self, incremental: bool):
+        """
+        Sélectionne les articles à analyser.
+        En mode incrémental, seuls les articles sans prédiction pour la version
+        courante du modèle sont retenus (anti-jointure $lookup), du plus ancien
+        au plus récent selon fetched_at.
+        """
+        if not incremental:
+            return self.articles.find(
+                {}, PredictorConfig.ARTICLE_FIELDS, batch_size=PredictorConfig.CURSOR_BATCH_SIZE
+            )
 
-        # Récupère tous les articles
-        cursor = self.articles.find({})
-        articles_list = list(cursor)
-        total = len(articles_list)
+        pipeline = [
+            {"$sort": {"fetched_at": 1}},
+            {"$project": PredictorConfig.ARTICLE_FIELDS},
+            {
+                "$lookup": {
+                    "from": PredictorConfig.PREDICTIONS_COLLECTION,
+                    "let": {"article_url": "$url"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$and": [
+                            {"$eq": ["$url", "$$article_url"]},
+                            {"$eq": ["$model_version", self.classifier.model_version]},
+                        ]}}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 1}},
+                    ],
+                    "as": "current_prediction"
+                }
+            },
+            {"$match": {"current_prediction": {"$size": 0}}},
+            {"$project": {"current_prediction": 0}},
+        ]
+        return self.articles.aggregate(
+            pipeline, allowDiskUse=True, batchSize=PredictorConfig.CURSOR_BATCH_SIZE
+        )
 
+    def predict_all_articles(self, incremental: bool = False):
+        """Analyse les articles et stocke les prédictions (tous, ou seulement les nouveaux)."""
+        mode = "des nouveaux articles" if incremental else "de tous les articles"
+        print(f"=== Analyse de toxicité {mode} ===\n")
+
+        # Le total n'est connu à l'avance qu'en mode complet
+        total = None if incremental else self.articles.count_documents({})
         if total == 0:
             print("Aucun article dans la base.")
             return
-
-        print(f"Total articles à analyser: {total}\n")
+        if total:
+            print(f"Total articles à analyser: {total}\n")
 
         # Statistiques
         stats = {
@@ -101,50 +149,126 @@ class ToxicityPredictor:
             "very_toxic": 0
         }
 
-        for i, article in enumerate(articles_list, 1):
-            url = article.get("url", "")
-            title = article.get("title", "")
-            content = article.get("content", "")
-            site = article.get("site", "")
+        # Écritures groupées ; les statistiques sont mises à jour au retour de chaque lot
+        writer = BulkWriter(self.predictions, on_result=partial(self._on_prediction_written, stats))
 
+        # Parcourt le curseur serveur et score par paquets pour remplir les lots du modèle
+        chunk = []
+        for i, article in enumerate(self._articles_to_score(incremental), 1):
+            progress = f"[{i}/{total}]" if total else f"[{i}]"
+            content = article.get("content", "")
             if not content or not content.strip():
-                print(f"[{i}/{total}] Skip (pas de contenu): {url}")
+                print(f"{progress} Skip (pas de contenu): {article.get('url', '')}")
                 stats["processed"] += 1
                 continue
 
-            print(f"[{i}/{total}] Analyse: {title[:50]}...")
-            result = self.classifier.predict(content)
-
-            prediction_doc = {
-                "url": url,
-                "site": site,
-                "title": title,
-                "text": content[:1000],
-                "prediction": result["prediction"],
-                "confidence": result["confidence"],
-                "toxicity_level": result["toxicity_level"],
-                "predicted_at": datetime.now(timezone.utc),
-                "article_id": article.get("_id")
-            }
-
-            try:
-                self.predictions.insert_one(prediction_doc)
-                stats["success"] += 1
-                stats[result["toxicity_level"]] += 1
-                if result["prediction"] == "toxic":
-                    stats["toxic"] += 1
-                else:
-                    stats["non_toxic"] += 1
+            chunk.append((progress, article))
+            if len(chunk) >= PredictorConfig.CHUNK_SIZE:
+                self._score_chunk(chunk, writer, incremental)
+                chunk = []
 
-                print(f"  → {result['prediction']} ({result['confidence']:.2%}) - {result['toxicity_level']}")
-            except Exception as e:
-                stats["errors"] += 1
-                print(f"  → Erreur: {e}")
+        if chunk:
+            self._score_chunk(chunk, writer, incremental)
+        writer.flush()
 
-            stats["processed"] += 1
+        if stats["processed"] == 0:
+            print("Aucun article à analyser.")
+            return
 
         self._print_analysis_summary(stats)
 
+    def _score_chunk(self, chunk, writer: BulkWriter, replace: bool):
+        """Score un paquet d'articles en un appel au classifieur puis met en file les résultats."""
+        reused = self._reusable_predictions(chunk, writer)
+        to_score = [(progress, article) for progress, article in chunk if article["url"] not in reused]
+
+        results = self.classifier.predict_many([article["content"] for _, article in to_score])
+        for (progress, article), result in zip(to_score, results):
+            self._store_article_prediction(article, result, writer, progress, replace)
+
+        for progress, article in chunk:
+            if article["url"] in reused:
+                self._store_article_prediction(article, reused[article["url"]], writer, progress, replace)
+
+    def _reusable_predictions(self, chunk, writer: BulkWriter) -> Dict:
+        """
+        Pour les quasi-doublons (champ duplicate_of posé par le scraper), reprend la
+        prédiction de l'article original si elle existe pour la version courante du modèle.
+        """
+        originals = {article["url"]: article["duplicate_of"]
+                     for _, article in chunk if article.get("duplicate_of")}
+        if not originals:
+            return {}
+
+        # L'original a pu être scoré dans un paquet précédent encore en tampon
+        writer.flush()
+        cursor = self.predictions.find(
+            {"url": {"$in": list(set(originals.values()))},
+             "model_version": self.classifier.model_version},
+            {"url": 1, "prediction": 1, "confidence": 1, "toxicity_level": 1}
+        )
+        known = {doc["url"]: doc for doc in cursor}
+
+        reused = {}
+        for url, original in originals.items():
+            if original in known:
+                doc = known[original]
+                reused[url] = {
+                    "prediction": doc["prediction"],
+                    "confidence": doc["confidence"],
+                    "toxicity_level": doc["toxicity_level"],
+                    "reused_from": original
+                }
+        return reused
+
+    def _store_article_prediction(self, article: Dict, result: Dict, writer: BulkWriter, progress: str,
+                                  replace: bool = False):
+        """
+        Met en file la prédiction d'un article pour écriture groupée.
+        Avec replace=True, une prédiction existante (version de modèle obsolète) est remplacée.
+        """
+        url = article.get("url", "")
+        title = article.get("title", "")
+        content = article.get("content", "")
+
+        print(f"{progress} Analyse: {title[:50]}...")
+        prediction_doc = {
+            "url": url,
+            "site": article.get("site", ""),
+            "title": title,
+            "text": content[:1000],
+            "prediction": result["prediction"],
+            "confidence": result["confidence"],
+            "toxicity_level": result["toxicity_level"],
+            "model_version": self.classifier.model_version,
+            "predicted_at": datetime.now(timezone.utc),
+            "article_id": article.get("_id")
+        }
+        if result.get("reused_from"):
+            prediction_doc["reused_from"] = result["reused_from"]
+
+        if replace:
+            writer.upsert({"url": url}, {"$set": prediction_doc}, context=(url, result))
+        else:
+            writer.insert(prediction_doc, context=(url, result))
+
+    def _on_prediction_written(self, stats: Dict, context, outcome: str, error: Optional[str]):
+        """Met à jour les statistiques selon le résultat d'écriture d'une prédiction."""
+        url, result = context
+        if outcome in (INSERTED, MATCHED):
+            stats["success"] += 1
+            stats[result["toxicity_level"]] += 1
+            if result["prediction"] == "toxic":
+                stats["toxic"] += 1
+            else:
+                stats["non_toxic"] += 1
+            print(f"  → {url}: {result['prediction']} ({result['confidence']:.2%}) - {result['toxicity_level']}")
+        else:
+            stats["errors"] += 1
+            print(f"  → Erreur {url}: {error}")
+
+        stats["processed"] += 1
+
     def get_statistics_by_site(self) -> Dict:
         """Calcule les statistiques de toxicité par site."""
         pipeline = [
@@ -245,9 +369,15 @@ class ToxicityPredictor:
 # ============================================================================
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyse de toxicité des articles collectés.")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="N'analyse que les articles sans prédiction pour la version courante du modèle"
+    )
+    args = parser.parse_args()
 
     predictor = ToxicityPredictor()
-    predictor.predict_all_articles()  # Analyse tous les articles
+    predictor.predict_all_articles(incremental=args.incremental)
     predictor.display_statistics()
 
 
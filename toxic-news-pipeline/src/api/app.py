@@ -1,23 +1,61 @@
 import os
-import io
-from typing import Optional, Dict
-from fastapi import FastAPI, HTTPException
+import json
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, AsyncIterator, Literal, Tuple, Union
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel, Field, constr
-from pymongo import MongoClient
-import matplotlib.pyplot as plt
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, constr
 
 # ----------------------------------------
 # Configuration du modèle
 # ----------------------------------------
 from src.models.classifier import ToxicityClassifier, MODEL_NAME, ARTICLE_THRESHOLD
+from src.models.cache import build_prediction_cache
+from src.api.batcher import PredictionBatcher
+from src.storage.mongo import toxicity_stats
+from src.api.stats_cache import StatisticsCache
+from src.api.plots import PlotCache, PLOT_FORMATS
+
+# ---------- Classifier ----------
+_clf = ToxicityClassifier(cache=build_prediction_cache())
+# Les requêtes /predict concurrentes sont regroupées en lots et scorées dans un
+# pool dédié de TOXIC_INFERENCE_WORKERS threads (voir src.api.batcher) : la boucle
+# asyncio reste libre pour /health et /stats pendant l'inférence
+_batcher = PredictionBatcher(_clf.predict_many)
+
+# ---------- MongoDB (Motor, voir src.storage.mongo) ----------
+# Dernières statistiques gardées en mémoire (change stream, sinon poll sur computed_at)
+_stats_cache = StatisticsCache(toxicity_stats)
+# Graphiques rendus une fois par version des statistiques, taille et format
+_plot_cache = PlotCache()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _batcher.start()
+    await _stats_cache.start()
+    yield
+    await _stats_cache.stop()
+    await _batcher.stop()
+
+async def predict_toxicity(text: str):
+    return await _batcher.predict(text)
+
+# Textes d'un même appel /predict/batch en cours de scoring simultanément
+BATCH_MAX_IN_FLIGHT = int(os.getenv("TOXIC_API_BATCH_IN_FLIGHT", "256"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Taille au-delà de laquelle un upload NDJSON est écrit sur disque
+NDJSON_SPOOL_BYTES = int(os.getenv("TOXIC_API_NDJSON_SPOOL_BYTES", str(8 * 1024 * 1024)))
 
 # ---------- FastAPI ----------
 app = FastAPI(
     title="Toxicity Prediction API",
     description="API de prédiction de toxicité de texte (multilingue XLM-R) et statistiques.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS (développement local)
@@ -32,27 +70,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ---------- Classifier ----------
-_clf = ToxicityClassifier()
-
-def predict_toxicity(text: str):
-    return _clf.predict(text)
-
-# ---------- MongoDB ----------
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-MONGO_DB = os.getenv("MONGO_DB", "toxic_news")
-STAT_COLLECTION = "statistics"
-
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
-stat_collection = db[STAT_COLLECTION]
-
-def get_latest_statistics():
-    doc = stat_collection.find_one(sort=[("computed_at", -1)])
-    if doc and "statistics" in doc:
-        return doc["statistics"]
-    return None
-
 # ---------- Schemas ----------
 class PredictRequest(BaseModel):
     text: constr(strip_whitespace=True, min_length=1) = Field(..., description="Texte à classifier")
@@ -68,18 +85,7 @@ class PredictResponse(BaseModel):
     stored: bool = False
     id: Optional[str] = None
 
-# ---------- Endpoints ----------
-@app.get("/health")
-def health():
-    return {"status": "ok", "app": "toxicity-api", "model": MODEL_NAME}
-
-@app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
-    try:
-        result = predict_toxicity(req.text)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Model inference failed: {e}")
-
+def to_response(result: dict) -> PredictResponse:
     return PredictResponse(
         is_toxic=result["prediction"] == "toxic",
         article_score=result["confidence"],
@@ -90,33 +96,171 @@ def predict(req: PredictRequest):
         id=None
     )
 
+# ---------- Batch (NDJSON) ----------
+def parse_batch_item(item) -> PredictRequest:
+    """Un élément de lot : objet PredictRequest ou texte brut"""
+    if isinstance(item, str):
+        item = {"text": item}
+    return PredictRequest.model_validate(item)
+
+async def iter_json_items(items: list) -> AsyncIterator[Tuple[int, Union[PredictRequest, str]]]:
+    """Éléments d'un tableau JSON ; une erreur de validation est renvoyée comme message"""
+    for index, item in enumerate(items):
+        try:
+            yield index, parse_batch_item(item)
+        except ValidationError as e:
+            yield index, f"Invalid item: {e.errors(include_url=False)}"
+
+async def spool_body(request: Request):
+    """
+    Copie le corps de la requête dans un fichier temporaire (en mémoire
+    jusqu'à NDJSON_SPOOL_BYTES). Il doit être lu avant de répondre : pendant
+    le streaming de la réponse, Starlette consomme les messages entrants
+    pour détecter la déconnexion du client.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=NDJSON_SPOOL_BYTES)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+async def iter_ndjson_items(spool) -> AsyncIterator[Tuple[int, Union[PredictRequest, str]]]:
+    """Lignes non vides d'un corps NDJSON, lues une à une"""
+    try:
+        index = 0
+        for line in spool:
+            if line.strip():
+                yield index, _parse_ndjson_line(line)
+                index += 1
+    finally:
+        spool.close()
+
+def _parse_ndjson_line(line: bytes) -> Union[PredictRequest, str]:
+    try:
+        item = json.loads(line)
+    except ValueError as e:
+        return f"Invalid JSON line: {e}"
+    try:
+        return parse_batch_item(item)
+    except ValidationError as e:
+        return f"Invalid item: {e.errors(include_url=False)}"
+
+async def stream_predictions(items: AsyncIterator[Tuple[int, Union[PredictRequest, str]]]) -> AsyncIterator[bytes]:
+    """
+    Score les éléments via le micro-batcher et émet une ligne NDJSON par
+    résultat, dans l'ordre de fin de traitement (champ index = position).
+    Chaque élément garde sa place jusqu'à ce que sa ligne soit envoyée : au
+    plus BATCH_MAX_IN_FLIGHT éléments (en cours ou en attente d'envoi) sont
+    en mémoire, même si le client lit lentement.
+    """
+    slots = asyncio.Semaphore(BATCH_MAX_IN_FLIGHT)
+    # (ligne, place à libérer après envoi)
+    finished: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def score(index: int, req: PredictRequest):
+        try:
+            line = {"index": index, **to_response(await predict_toxicity(req.text)).model_dump()}
+        except Exception as e:
+            line = {"index": index, "error": f"Model inference failed: {e}"}
+        await finished.put((line, True))
+
+    async def produce():
+        tasks = set()
+        try:
+            async for index, item in items:
+                await slots.acquire()
+                if isinstance(item, str):
+                    await finished.put(({"index": index, "error": item}, True))
+                    continue
+                task = asyncio.create_task(score(index, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except Exception as e:
+            await finished.put(({"error": f"Batch aborted: {e}"}, False))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await finished.put((done, False))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            line, holds_slot = await finished.get()
+            if line is done:
+                break
+            yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+            if holds_slot:
+                slots.release()
+    finally:
+        # Client déconnecté : on arrête de lire et de scorer
+        producer.cancel()
+
+# ---------- Endpoints ----------
+@app.get("/health")
+async def health():
+    return {"status": "ok", "app": "toxicity-api", "model": MODEL_NAME}
+
+@app.post("/predict", response_model=PredictResponse)
+async def predict(req: PredictRequest):
+    try:
+        result = await predict_toxicity(req.text)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model inference failed: {e}")
+
+    return to_response(result)
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """
+    Prédiction d'un lot de textes. Corps : tableau JSON (textes ou objets
+    PredictRequest) ou upload NDJSON (Content-Type application/x-ndjson,
+    un élément par ligne, mis en tampon sur disque s'il est gros). Réponse NDJSON streamée au fil des résultats,
+    chaque ligne portant l'index de l'élément et le résultat ou l'erreur.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = iter_ndjson_items(await spool_body(request))
+    else:
+        try:
+            body = await request.json()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of texts or PredictRequest objects")
+        items = iter_json_items(body)
+    return StreamingResponse(stream_predictions(items), media_type=NDJSON_MEDIA_TYPE)
+
+def _no_statistics():
+    return JSONResponse(content={"message": "Aucune statistique disponible."}, status_code=404)
+
 @app.get("/stats")
-def stats_json():
-    stats = get_latest_statistics()
-    if not stats:
-        return JSONResponse(content={"message": "Aucune statistique disponible."}, status_code=404)
-    return stats
+async def stats_json(request: Request):
+    snapshot = _stats_cache.snapshot
+    if snapshot is None or not snapshot.statistics:
+        return _no_statistics()
+    if snapshot.is_fresh_for(request):
+        return Response(status_code=304, headers=snapshot.headers())
+    return JSONResponse(content=jsonable_encoder(snapshot.statistics), headers=snapshot.headers())
 
 @app.get("/stats/plot")
-def stats_plot():
-    stats = get_latest_statistics()
-    if not stats:
-        return JSONResponse(content={"message": "Aucune statistique disponible."}, status_code=404)
-
-    sites = list(stats.keys())
-    slightly = [stats[s]["slightly_toxic_pct"] for s in sites]
-    very = [stats[s]["very_toxic_pct"] for s in sites]
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(sites, slightly, label="Légèrement toxique", color="orange")
-    ax.bar(sites, very, bottom=slightly, label="Très toxique", color="red")
-    ax.set_ylabel("Pourcentage (%)")
-    ax.set_title("Toxicité par site")
-    ax.legend()
-    plt.xticks(rotation=45)
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    plt.close(fig)
-    return StreamingResponse(buf, media_type="image/png")
+async def stats_plot(
+    request: Request,
+    format: Literal["png", "svg"] = Query("png", description="Format de l'image"),
+    width: int = Query(1000, ge=200, le=4000, description="Largeur en pixels"),
+    height: int = Query(600, ge=200, le=4000, description="Hauteur en pixels"),
+):
+    snapshot = _stats_cache.snapshot
+    if snapshot is None or not snapshot.statistics:
+        return _no_statistics()
+
+    variant = f"{width}x{height}.{format}"
+    # Les caches partagés peuvent stocker l'image, mais la revalident à chaque appel
+    headers = snapshot.headers(variant, cache_control="public, no-cache")
+    if snapshot.is_fresh_for(request, variant):
+        return Response(status_code=304, headers=headers)
+
+    image = await _plot_cache.get(snapshot, width, height, format)
+    return Response(content=image, media_type=PLOT_FORMATS[format], headers=headers)
@@ -0,0 +1,132 @@
+"""
+Micro-batching des prédictions de l'API.
+Les requêtes concurrentes déposent leur texte dans une file ; un collecteur
+regroupe les textes arrivés pendant au plus MAX_WAIT_MS (ou jusqu'à
+MAX_BATCH textes) et les score en un seul appel à predict_many, exécuté
+dans un pool de threads d'inférence dédié (INFERENCE_WORKERS collecteurs,
+un thread chacun), hors de la boucle asyncio. Chaque appelant récupère son
+résultat via un future.
+"""
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+MAX_BATCH = int(os.getenv("TOXIC_API_MAX_BATCH", "32"))         # Textes par appel à predict_many
+MAX_WAIT_MS = float(os.getenv("TOXIC_API_MAX_WAIT_MS", "10"))   # Attente maximale pour compléter un lot
+INFERENCE_WORKERS = int(os.getenv("TOXIC_INFERENCE_WORKERS", "1"))  # Lots scorés en parallèle
+
+
+class PredictionBatcher:
+    """File de prédictions vidée par lots dans un thread d'inférence dédié."""
+
+    def __init__(self, predict_many: Callable[[List[str]], List[dict]],
+                 max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS,
+                 workers: int = INFERENCE_WORKERS):
+        self.predict_many = predict_many
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        # Par défaut un seul thread : les forward passes ne se disputent pas les cœurs.
+        # Plus de workers aide quand un lot attend surtout le cache MongoDB.
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._queue: Optional[asyncio.Queue] = None
+        self._collectors: List[asyncio.Task] = []
+
+    def start(self):
+        """Démarre les collecteurs (à appeler depuis la boucle de l'application)."""
+        self._queue = asyncio.Queue()
+        self._collectors = [asyncio.create_task(self._collect()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Arrête les collecteurs ; les requêtes en file ou en cours de regroupement échouent."""
+        for collector in self._collectors:
+            collector.cancel()
+        await asyncio.gather(*self._collectors, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+        self._executor.shutdown(wait=True)
+
+    async def predict(self, text: str) -> dict:
+        """Score un texte ; attend que son lot soit traité."""
+        if self._queue is None:
+            raise RuntimeError("Prediction batcher not started")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    @staticmethod
+    def _fail_stopped(batch):
+        """Fait échouer les appelants non résolus d'un lot interrompu par stop()."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+    async def _next_batch(self):
+        """Attend un premier texte puis complète le lot jusqu'à max_batch ou max_wait."""
+        batch = [await self._queue.get()]
+        try:
+            deadline = asyncio.get_running_loop().time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Textes déjà retirés de la file : stop() ne les verra pas
+            self._fail_stopped(batch)
+            raise
+        return batch
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            # Appelants partis entre-temps (requête annulée) : inutile de les scorer
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.predict_many, [text for text, _ in batch]
+                )
+            except asyncio.CancelledError:
+                self._fail_stopped(batch)
+                raise
+            except Exception as e:
+                await self._score_one_by_one(batch, e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _score_one_by_one(self, batch, error: Exception):
+        """
+        Le lot a échoué : chaque texte est rescoré seul, pour que seul le texte
+        fautif échoue et non toutes les requêtes regroupées avec lui.
+        """
+        if len(batch) == 1:
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(error)
+            return
+        loop = asyncio.get_running_loop()
+        for text, future in batch:
+            if future.done():
+                continue
+            try:
+                result = (await loop.run_in_executor(self._executor, self.predict_many, [text]))[0]
+            except asyncio.CancelledError:
+                self._fail_stopped(batch)
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
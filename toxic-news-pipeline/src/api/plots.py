@@ -0,0 +1,74 @@
+"""
+Graphique de toxicité par site, rendu une seule fois par version des statistiques.
+Le rendu utilise l'API objet de matplotlib (Figure + canvas Agg) au lieu de
+pyplot : pas d'état global, donc plusieurs rendus peuvent tourner en parallèle
+dans le threadpool. Chaque variante (taille, format) est gardée en mémoire
+jusqu'à l'arrivée d'un nouveau document de statistiques.
+"""
+import io
+import asyncio
+from typing import Dict, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from starlette.concurrency import run_in_threadpool
+
+PLOT_DPI = 100
+PLOT_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+MAX_PLOT_VARIANTS = 32  # Variantes (taille, format) gardées par version
+
+
+def render_stats_plot(stats: dict, width: int, height: int, fmt: str) -> bytes:
+    """Barres empilées légèrement / très toxique par site (width x height en pixels)"""
+    sites = list(stats.keys())
+    slightly = [stats[s]["slightly_toxic_pct"] for s in sites]
+    very = [stats[s]["very_toxic_pct"] for s in sites]
+
+    fig = Figure(figsize=(width / PLOT_DPI, height / PLOT_DPI), dpi=PLOT_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(sites, slightly, label="Légèrement toxique", color="orange")
+    ax.bar(sites, very, bottom=slightly, label="Très toxique", color="red")
+    ax.set_ylabel("Pourcentage (%)")
+    ax.set_title("Toxicité par site")
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches="tight")
+    return buf.getvalue()
+
+
+class PlotCache:
+    """Rendus du graphique pour la version courante des statistiques"""
+
+    def __init__(self, max_variants: int = MAX_PLOT_VARIANTS):
+        self.max_variants = max_variants
+        self._version = None
+        self._plots: Dict[Tuple[int, int, str], bytes] = {}
+        self._pending: Dict[Tuple[str, int, int, str], asyncio.Future] = {}
+
+    async def get(self, snapshot, width: int, height: int, fmt: str) -> bytes:
+        """Retourne le graphique ; un seul rendu par variante, même sous requêtes concurrentes"""
+        if snapshot.version != self._version:
+            self._version = snapshot.version
+            self._plots.clear()
+        variant = (width, height, fmt)
+        if variant in self._plots:
+            return self._plots[variant]
+
+        key = (snapshot.version, *variant)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                run_in_threadpool(render_stats_plot, snapshot.statistics, width, height, fmt)
+            )
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        data = await asyncio.shield(pending)
+
+        if snapshot.version == self._version:
+            if len(self._plots) >= self.max_variants:
+                self._plots.pop(next(iter(self._plots)))
+            self._plots[variant] = data
+        return data
@@ -0,0 +1,145 @@
+"""
+Cache en mémoire du dernier document de la collection statistics.
+Le document est rechargé quand un change stream signale une écriture, et
+une fois à chaque ouverture du flux (aucune écriture ne peut passer entre
+la lecture et le début de l'écoute) ; si le serveur n'en fournit pas
+(MongoDB standalone, sans replica set), un poll léger sur computed_at
+toutes les STATS_POLL_SECONDS le remplace. Les
+endpoints /stats servent le snapshot en mémoire avec ETag / Last-Modified,
+et répondent 304 aux clients dont la version est à jour.
+"""
+import os
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+STATS_POLL_SECONDS = float(os.getenv("TOXIC_STATS_POLL_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    statistics: dict
+    computed_at: datetime
+    version: str  # _id du document
+    last_modified: str
+
+    @classmethod
+    def from_document(cls, doc):
+        computed_at = doc["computed_at"]
+        if computed_at.tzinfo is None:
+            computed_at = computed_at.replace(tzinfo=timezone.utc)
+        return cls(
+            statistics=doc["statistics"],
+            computed_at=computed_at,
+            version=str(doc["_id"]),
+            last_modified=format_datetime(computed_at, usegmt=True),
+        )
+
+    def etag(self, variant: Optional[str] = None) -> str:
+        """ETag de la version ; variant distingue les représentations (taille, format du graphique)"""
+        return f'"{self.version}-{variant}"' if variant else f'"{self.version}"'
+
+    def headers(self, variant: Optional[str] = None, cache_control: str = "no-cache"):
+        # no-cache : le client garde la réponse mais revalide à chaque appel
+        return {"ETag": self.etag(variant), "Last-Modified": self.last_modified, "Cache-Control": cache_control}
+
+    def is_fresh_for(self, request, variant: Optional[str] = None) -> bool:
+        """Vrai si le client possède déjà cette version (réponse 304)"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return self.etag(variant) in tags or "*" in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            # Zone "-0000" : parsedate_to_datetime renvoie une date naïve, lue en UTC
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            # Last-Modified est à la seconde près
+            return self.computed_at.replace(microsecond=0) <= since
+        return False
+
+
+class StatisticsCache:
+    """Dernières statistiques en mémoire, tenues à jour en tâche de fond"""
+
+    def __init__(self, collection, poll_interval: float = STATS_POLL_SECONDS):
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.snapshot: Optional[StatsSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    async def start(self):
+        try:
+            await self.collection.create_index("computed_at")
+        except PyMongoError as e:
+            print(f"Warning: Index creation failed - {e}")
+        # Premier chargement fait par _follow, une fois le flux ouvert
+        self._task = asyncio.create_task(self._follow())
+        ready = asyncio.create_task(self._ready.wait())
+        await asyncio.wait([ready, self._task], return_when=asyncio.FIRST_COMPLETED)
+        ready.cancel()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def refresh(self):
+        """Recharge le document le plus récent"""
+        try:
+            doc = await self.collection.find_one(
+                {"statistics": {"$exists": True}}, sort=[("computed_at", -1)]
+            )
+        except PyMongoError as e:
+            print(f"Warning: statistics refresh failed - {e}")
+            return
+        if doc and doc.get("computed_at"):
+            self.snapshot = StatsSnapshot.from_document(doc)
+
+    async def _follow(self):
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                # Change streams indisponibles (pas de replica set) : poll sur computed_at
+                print(f"Statistics change stream unavailable ({e.code}), polling every {self.poll_interval}s")
+                await self.refresh()
+                self._ready.set()
+                await self._poll()
+            except PyMongoError as e:
+                # Flux interrompu (connexion perdue) : reprise ; le rattrapage
+                # se fait à la réouverture du flux
+                print(f"Warning: statistics change stream interrupted - {e}")
+                self._ready.set()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "replace", "update"]}}}]
+        async with self.collection.watch(pipeline) as stream:
+            # Flux ouvert : les écritures suivantes seront notifiées
+            await self.refresh()
+            self._ready.set()
+            async for _ in stream:
+                await self.refresh()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                latest = await self.collection.find_one(
+                    {"statistics": {"$exists": True}}, {"_id": 1}, sort=[("computed_at", -1)]
+                )
+            except PyMongoError as e:
+                print(f"Warning: statistics poll failed - {e}")
+                continue
+            if latest and (self.snapshot is None or str(latest["_id"]) != self.snapshot.version):
+                await self.refresh()
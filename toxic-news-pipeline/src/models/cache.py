@@ -0,0 +1,158 @@
+"""
+Cache des prédictions adressé par contenu.
+La clé est un hash du texte normalisé et de la version du modèle ; la valeur
+est la liste des probabilités brutes par segment. Les seuils ne font pas
+partie de la clé : une entrée reste valide après un changement de seuil et
+est simplement réagrégée avec les seuils courants.
+"""
+
+import os
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import MongoClient, UpdateOne, errors
+
+CACHE_BACKEND = os.getenv("TOXIC_CACHE", "mongo").lower()  # "mongo", "memory" ou "none"
+CACHE_MAX_ENTRIES = int(os.getenv("TOXIC_CACHE_MAX_ENTRIES", "200000"))
+CACHE_TTL_HOURS = float(os.getenv("TOXIC_CACHE_TTL_HOURS", str(24 * 30)))
+CACHE_EVICT_EVERY = int(os.getenv("TOXIC_CACHE_EVICT_EVERY", "1000"))  # Entrées écrites entre deux purges
+# Délai court : un MongoDB injoignable ne doit pas bloquer les lots d'inférence
+CACHE_MONGO_TIMEOUT_MS = int(os.getenv("TOXIC_CACHE_MONGO_TIMEOUT_MS", "1500"))
+CACHE_COLLECTION = "prediction_cache"
+
+
+def normalize_text(text: str) -> str:
+    """Normalise le texte (Unicode NFC, espaces) avant le hachage."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(text: str, model_version: str) -> str:
+    """Clé de cache : SHA-256 de la version du modèle et du texte normalisé."""
+    payload = f"{model_version}\n{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class MemoryPredictionCache:
+    """Cache LRU en mémoire avec expiration, partagé entre threads."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_hours: float = CACHE_TTL_HOURS):
+        self.max_entries = max_entries
+        self.ttl = ttl_hours * 3600
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[List[float]]]:
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                stored_at, probs = entry
+                if now - stored_at > self.ttl:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = probs
+        return found
+
+    def set_many(self, items: Dict[str, List[List[float]]]):
+        now = time.monotonic()
+        with self._lock:
+            for key, probs in items.items():
+                self._entries[key] = (now, probs)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class MongoPredictionCache:
+    """Cache persistant dans une collection MongoDB (index TTL + plafond de taille)."""
+
+    def __init__(self, collection, max_entries: int = CACHE_MAX_ENTRIES, ttl_hours: float = CACHE_TTL_HOURS,
+                 evict_every: int = CACHE_EVICT_EVERY):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl = timedelta(hours=ttl_hours)
+        # La purge (comptage + tri sur created_at) n'est faite que toutes les evict_every écritures
+        self.evict_every = max(1, evict_every)
+        self._writes_since_evict = 0
+        self._evict_lock = threading.Lock()
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Index TTL sur created_at : MongoDB supprime les entrées expirées."""
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=int(self.ttl.total_seconds()))
+        except Exception as e:
+            print(f"⚠ Warning index cache: {e}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[List[float]]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        # Le moniteur TTL passe toutes les 60 s : on filtre aussi à la lecture
+        oldest = datetime.now(timezone.utc) - self.ttl
+        try:
+            cursor = self.collection.find(
+                {"_id": {"$in": keys}, "created_at": {"$gte": oldest}},
+                {"probs": 1}
+            )
+            return {doc["_id"]: doc["probs"] for doc in cursor}
+        except errors.PyMongoError as e:
+            print(f"⚠ Cache indisponible (lecture): {e}")
+            return {}
+
+    def set_many(self, items: Dict[str, List[List[float]]]):
+        if not items:
+            return
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne({"_id": key}, {"$setOnInsert": {"probs": probs, "created_at": now}}, upsert=True)
+            for key, probs in items.items()
+        ]
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+            if self._evict_due(len(ops)):
+                self._evict_overflow()
+        except errors.PyMongoError as e:
+            print(f"⚠ Cache indisponible (écriture): {e}")
+
+    def _evict_due(self, written: int) -> bool:
+        """Compte les écritures ; vrai quand une purge est due."""
+        with self._evict_lock:
+            self._writes_since_evict += written
+            if self._writes_since_evict < self.evict_every:
+                return False
+            self._writes_since_evict = 0
+            return True
+
+    def _evict_overflow(self):
+        """Supprime les entrées les plus anciennes au-delà de max_entries."""
+        overflow = self.collection.estimated_document_count() - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = self.collection.find({}, {"_id": 1}).sort("created_at", 1).limit(overflow)
+        self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in oldest]}})
+
+
+def build_prediction_cache(backend: str = CACHE_BACKEND) -> Optional[object]:
+    """Construit le cache configuré par TOXIC_CACHE (None si désactivé)."""
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryPredictionCache()
+    if backend == "mongo":
+        client = MongoClient(
+            os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+            serverSelectionTimeoutMS=CACHE_MONGO_TIMEOUT_MS,
+        )
+        collection = client[os.getenv("MONGO_DB", "toxic_news")][CACHE_COLLECTION]
+        return MongoPredictionCache(collection)
+    raise ValueError(f"Cache inconnu: {backend} (attendu: mongo, memory ou none)")
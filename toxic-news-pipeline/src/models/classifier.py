@@ -1,32 +1,98 @@
 import os
 import torch
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from typing import Optional
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+from src.models.cache import cache_key
 
 # ========================================
 # Configuration
 # ========================================
 MODEL_NAME = "unitary/multilingual-toxic-xlm-roberta"
+MODEL_REVISION = os.getenv("TOXIC_MODEL_REVISION") or None  # Commit/tag HF, None = dernière version
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
 THRESHOLD_SLIGHTLY_TOXIC = float(os.getenv("TOXIC_SLIGHTLY_THRESHOLD", "0.3"))
 THRESHOLD_VERY_TOXIC = float(os.getenv("TOXIC_VERY_THRESHOLD", "0.65"))
 ARTICLE_THRESHOLD = float(os.getenv("TOXIC_ARTICLE_THRESHOLD", "0.5"))
+QUANTIZE = os.getenv("TOXIC_QUANTIZE", "none").lower()  # "int8" = quantification dynamique des Linear
 MAX_TOKENS = 256  # Max tokens par segment
+SEGMENT_STRIDE = int(os.getenv("TOXIC_SEGMENT_STRIDE", "0"))  # Tokens de recouvrement entre segments
+BATCH_SIZE = int(os.getenv("TOXIC_BATCH_SIZE", "16"))  # Segments par passe du modèle
+
+# Backend d'inférence : "torch" (PyTorch eager) ou "onnx" (ONNX Runtime CPU)
+BACKEND = os.getenv("TOXIC_BACKEND", "torch").lower()
+ONNX_DIR = os.getenv("TOXIC_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "toxic_news", "onnx"))
+ORT_THREADS = int(os.getenv("TOXIC_ORT_THREADS", "0"))  # 0 = choix d'ONNX Runtime
 
 # ========================================
 # Classifieur
 # ========================================
+class _LogitsOnly(torch.nn.Module):
+    """Enveloppe le modèle HF pour n'exporter que les logits en ONNX."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def export_onnx(model, path):
+    """Exporte le modèle en ONNX (axes batch/séquence dynamiques) de façon atomique."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dummy = torch.ones((1, 8), dtype=torch.long)
+    tmp_path = path + ".tmp"
+    torch.onnx.export(
+        _LogitsOnly(model).eval(),
+        (dummy, dummy),
+        tmp_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
 class ToxicityClassifier:
-    def __init__(self):
-        print("Chargement du modèle...")
-        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-        self.model.to(DEVICE)
-        self.model.eval()
+    def __init__(self, backend: str = BACKEND, quantize: str = QUANTIZE, cache: Optional[object] = None):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Backend inconnu: {backend} (attendu: torch ou onnx)")
+        if quantize not in ("none", "int8"):
+            raise ValueError(f"Quantification inconnue: {quantize} (attendu: none ou int8)")
+        self.backend = backend
+        self.quantize = quantize
+        self.model = None
+        self.session = None
+        self.cache = cache
+
+        print(f"Chargement du modèle (backend={backend}, quantize={quantize})...")
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, revision=MODEL_REVISION, use_fast=True)
+        self.config = AutoConfig.from_pretrained(MODEL_NAME, revision=MODEL_REVISION)
+        self.revision = MODEL_REVISION or getattr(self.config, "_commit_hash", None) or "main"
+
+        if backend == "onnx":
+            self.session = self._load_onnx_session()
+        else:
+            self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, revision=MODEL_REVISION)
+            self.model.eval()
+            if quantize == "int8":
+                # Quantification dynamique INT8 des couches Linear (CPU uniquement)
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            else:
+                self.model.to(DEVICE)
 
         # Liste des labels liés à la toxicité
-        self.id2label = self.model.config.id2label
+        self.id2label = self.config.id2label
         self.toxic_labels = [
             i for i, name in self.id2label.items()
             if "toxic" in name.lower() or
@@ -36,15 +102,56 @@ class ToxicityClassifier:
                "hate" in name.lower()
         ]
 
-    def _predict_raw(self, texts):
-        enc = self.tokenizer(
-            texts,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=MAX_TOKENS
-        ).to(DEVICE)
+    def _load_onnx_session(self):
+        """Exporte le modèle en ONNX au premier lancement puis ouvre une session ONNX Runtime."""
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("Le backend onnx nécessite le paquet onnxruntime") from e
+
+        path = os.path.join(ONNX_DIR, f"{MODEL_NAME.replace('/', '__')}@{self.revision[:12]}.onnx")
+        if not os.path.exists(path):
+            print(f"Export ONNX vers {path}...")
+            model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, revision=MODEL_REVISION)
+            export_onnx(model, path)
+            del model
+
+        if self.quantize == "int8":
+            path = self._quantize_onnx(path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ORT_THREADS > 0:
+            options.intra_op_num_threads = ORT_THREADS
+        return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def _quantize_onnx(path):
+        """Quantifie dynamiquement les poids du modèle ONNX en INT8 (fichier mis en cache)."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
 
+        quantized_path = path.replace(".onnx", ".int8.onnx")
+        if not os.path.exists(quantized_path):
+            print(f"Quantification INT8 vers {quantized_path}...")
+            tmp_path = quantized_path + ".tmp"
+            quantize_dynamic(path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quantized_path)
+        return quantized_path
+
+    @property
+    def _tensor_type(self):
+        return "np" if self.session is not None else "pt"
+
+    def _forward(self, enc):
+        """Passe avant sur un lot déjà tokenisé et paddé."""
+        if self.session is not None:
+            logits = self.session.run(["logits"], {
+                "input_ids": np.asarray(enc["input_ids"], dtype=np.int64),
+                "attention_mask": np.asarray(enc["attention_mask"], dtype=np.int64),
+            })[0]
+            return 1.0 / (1.0 + np.exp(-logits))  # multi-label
+
+        enc = enc.to(DEVICE if self.quantize == "none" else "cpu")
         with torch.no_grad():
             outputs = self.model(**enc)
             logits = outputs.logits
@@ -52,18 +159,88 @@ class ToxicityClassifier:
 
         return probs.cpu().numpy()
 
-    def _split_text(self, text, max_words=100):
-        """Découpe le texte en segments pour éviter la dilution."""
-        words = text.split()
-        chunks = []
-        for i in range(0, len(words), max_words):
-            chunks.append(" ".join(words[i:i + max_words]))
-        return chunks
+    def _segment(self, text, stride=SEGMENT_STRIDE):
+        """
+        Découpe le texte en fenêtres de tokens remplissant MAX_TOKENS.
+        Le texte est tokenisé une seule fois ; chaque segment est une liste
+        d'IDs prête pour le modèle (tokens spéciaux inclus).
+        """
+        ids = self.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        window = MAX_TOKENS - self.tokenizer.num_special_tokens_to_add(pair=False)
+        step = max(1, window - max(0, stride))
+
+        segments = []
+        for i in range(0, max(len(ids), 1), step):
+            segments.append(self.tokenizer.build_inputs_with_special_tokens(ids[i:i + window]))
+            if i + window >= len(ids):
+                break
+        return segments
+
+    def _predict_batched(self, segments, batch_size=BATCH_SIZE):
+        """
+        Passe les segments (listes d'IDs) dans le modèle par lots de taille batch_size.
+        Les segments sont triés par nombre de tokens avant le découpage en lots
+        pour limiter le padding, puis les résultats sont remis dans l'ordre d'origine.
+        """
+        if not segments:
+            return []
+        batch_size = max(1, int(batch_size))
+
+        order = sorted(range(len(segments)), key=lambda i: len(segments[i]))
+
+        probs = [None] * len(segments)
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            enc = self.tokenizer.pad(
+                {"input_ids": [segments[i] for i in batch_idx]},
+                return_tensors=self._tensor_type
+            )
+            for i, seg_probs in zip(batch_idx, self._forward(enc)):
+                probs[i] = seg_probs
+        return probs
+
+    def predict(self, text: str, batch_size: int = BATCH_SIZE):
+        return self.predict_many([text], batch_size=batch_size)[0]
+
+    @property
+    def model_version(self) -> str:
+        """Identifie tout ce qui influence les probabilités brutes par segment."""
+        return (f"{MODEL_NAME}@{self.revision}/{self.backend}/{self.quantize}"
+                f"/seg{MAX_TOKENS}s{SEGMENT_STRIDE}")
+
+    def predict_many(self, texts, batch_size: int = BATCH_SIZE):
+        """Prédit plusieurs articles en partageant les lots de segments entre articles."""
+        texts = list(texts)
+        keys = [cache_key(text, self.model_version) for text in texts]
+        known = self.cache.get_many(set(keys)) if self.cache is not None else {}
+
+        # Segmente uniquement les textes absents du cache (une fois par clé)
+        segments, owners, computed = [], [], {}
+        for key, text in zip(keys, texts):
+            if key in known or key in computed:
+                continue
+            computed[key] = []
+            article_segments = self._segment(text)
+            segments.extend(article_segments)
+            owners.extend([key] * len(article_segments))
+
+        probs = self._predict_batched(segments, batch_size)
+
+        # Regroupe les probabilités des segments par article
+        for owner, seg_probs in zip(owners, probs):
+            computed[owner].append(seg_probs)
+
+        if self.cache is not None and computed:
+            self.cache.set_many({
+                key: [[float(p) for p in seg] for seg in segment_probs]
+                for key, segment_probs in computed.items()
+            })
 
-    def predict(self, text: str):
-        segments = self._split_text(text)
-        segment_probs = [self._predict_raw([seg])[0] for seg in segments]
+        known.update(computed)
+        return [self._aggregate(np.asarray(known[key])) for key in keys]
 
+    def _aggregate(self, segment_probs):
+        """Agrège les probabilités des segments d'un article en une prédiction."""
         # Score toxique = max des scores sur tous les segments
         toxic_score = max([float(np.mean([seg[i] for i in self.toxic_labels])) for seg in segment_probs])
 
@@ -0,0 +1,88 @@
+"""
+Validation du mode quantifié INT8.
+Compare les scores fp32 et INT8 sur un échantillon d'articles stockés
+et compte les changements de toxicity_level.
+
+Usage : python -m src.models.validate_quantization --sample 200 [--backend onnx]
+"""
+
+import os
+import gc
+import time
+import argparse
+from collections import Counter
+
+from pymongo import MongoClient
+from src.models.classifier import ToxicityClassifier, BACKEND
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("MONGO_DB", "toxic_news")
+
+
+def load_sample(size: int):
+    """Tire un échantillon aléatoire d'articles avec contenu."""
+    client = MongoClient(MONGO_URI)
+    articles = client[MONGO_DB]["articles"]
+    pipeline = [
+        {"$match": {"content": {"$nin": [None, ""]}}},
+        {"$sample": {"size": size}},
+        {"$project": {"url": 1, "content": 1}},
+    ]
+    docs = list(articles.aggregate(pipeline))
+    client.close()
+    return docs
+
+
+def score(texts, backend: str, quantize: str):
+    """Score les textes avec une configuration donnée puis libère le modèle."""
+    clf = ToxicityClassifier(backend=backend, quantize=quantize)
+    start = time.perf_counter()
+    results = clf.predict_many(texts)
+    elapsed = time.perf_counter() - start
+    del clf
+    gc.collect()
+    return results, elapsed
+
+
+def compare(reference, quantized):
+    """Calcule les écarts entre prédictions fp32 et INT8."""
+    transitions = Counter()
+    diffs = []
+    for ref, quant in zip(reference, quantized):
+        diffs.append(abs(ref["confidence"] - quant["confidence"]))
+        if ref["toxicity_level"] != quant["toxicity_level"]:
+            transitions[(ref["toxicity_level"], quant["toxicity_level"])] += 1
+    return transitions, diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les scores fp32 et INT8 sur des articles stockés.")
+    parser.add_argument("--sample", type=int, default=200, help="Nombre d'articles à échantillonner")
+    parser.add_argument("--backend", default=BACKEND, choices=["torch", "onnx"])
+    args = parser.parse_args()
+
+    docs = load_sample(args.sample)
+    if not docs:
+        print("Aucun article dans la base.")
+        return
+    texts = [doc["content"] for doc in docs]
+
+    reference, t_ref = score(texts, args.backend, "none")
+    quantized, t_quant = score(texts, args.backend, "int8")
+    transitions, diffs = compare(reference, quantized)
+    changed = sum(transitions.values())
+
+    print("\n" + "="*50)
+    print("VALIDATION QUANTIFICATION INT8")
+    print("="*50)
+    print(f"Articles comparés: {len(docs)} (backend={args.backend})")
+    print(f"Temps fp32: {t_ref:.1f}s | INT8: {t_quant:.1f}s")
+    print(f"Écart de confiance moyen: {sum(diffs) / len(diffs):.4f} | max: {max(diffs):.4f}")
+    print(f"toxicity_level modifiés: {changed} ({changed / len(docs):.2%})")
+    for (before, after), count in transitions.most_common():
+        print(f"  - {before} → {after}: {count}")
+    print("="*50 + "\n")
+
+
+if __name__ == "__main__":
+    main()
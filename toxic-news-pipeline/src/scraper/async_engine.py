@@ -0,0 +1,169 @@
+"""
+Moteur de scraping asynchrone (asyncio + httpx).
+Tous les flux et articles sont traités en parallèle ; la politesse est
+appliquée par domaine (concurrence maximale et délai minimal entre deux
+requêtes vers le même hôte) au lieu d'une pause globale après chaque article.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import feedparser
+import httpx
+
+from src.scraper.extraction import EXTRACT_PROCESSES
+from src.scraper.scrape import Config, NewsScraper, RSS_SOURCES, PAGE_FIRST, iter_feeds
+
+
+# Statuts relancés, comme la stratégie Retry du client synchrone
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1
+
+
+class DomainThrottle:
+    """Limite la concurrence et espace les requêtes pour chaque hôte"""
+
+    def __init__(self, max_concurrency=Config.PER_DOMAIN_CONCURRENCY, min_delay=Config.DOMAIN_DELAY):
+        self.min_delay = min_delay
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(max_concurrency))
+        self._locks = defaultdict(asyncio.Lock)
+        self._last_request = defaultdict(float)
+
+    async def wait_turn(self, host):
+        """Attend que le délai minimal depuis la dernière requête vers l'hôte soit écoulé"""
+        async with self._locks[host]:
+            wait = self._last_request[host] + self.min_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request[host] = time.monotonic()
+
+    def slot(self, host):
+        return self._semaphores[host]
+
+
+class AsyncNewsScraper(NewsScraper):
+    """Orchestrateur concurrent : mêmes étapes et même schéma de document que NewsScraper"""
+
+    ENGINE = "async"
+
+    def __init__(self, extract_processes=EXTRACT_PROCESSES, metrics_json=Config.METRICS_JSON):
+        super().__init__(extract_processes=extract_processes, metrics_json=metrics_json)
+        self.throttle = DomainThrottle()
+
+    def scrape_all(self):
+        """Lance le scraping de tous les sites"""
+        print("=== Début du scraping (asynchrone) ===\n")
+        try:
+            asyncio.run(self._scrape_all_async())
+        finally:
+            # Même interrompu, le run écrit ses articles en attente et son rapport
+            self._finish()
+
+    async def _scrape_all_async(self):
+        limits = httpx.Limits(max_connections=Config.CONCURRENCY)
+        headers = dict(self.http_client.session.headers)
+        async with httpx.AsyncClient(headers=headers, timeout=Config.TIMEOUT,
+                                     follow_redirects=True, limits=limits) as client:
+            tasks = []
+            for site_url, rss_feeds in RSS_SOURCES.items():
+                site_domain = self._get_domain(site_url)
+                for rss_url, strategy in iter_feeds(rss_feeds):
+                    tasks.append(self._scrape_feed_async(client, rss_url, site_domain, strategy))
+            # Un flux en erreur n'annule pas les autres
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch(self, client, url, headers=None):
+        """Télécharge une URL en respectant la politesse de son domaine"""
+        async with self.throttle.slot(urlparse(url).netloc):
+            return await self._request(client, url, headers)
+
+    async def _request(self, client, url, headers=None):
+        """GET avec délai par hôte et relances ; l'appelant détient la place du domaine"""
+        host = urlparse(url).netloc
+        for attempt in range(MAX_RETRIES + 1):
+            await self.throttle.wait_turn(host)
+            try:
+                response = await client.get(url, headers=headers)
+                if response.status_code == 304:
+                    return response
+                if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
+                    continue
+                response.raise_for_status()
+                return response
+            except httpx.TransportError as e:
+                if attempt < MAX_RETRIES:
+                    await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
+                    continue
+                print(f"Erreur HTTP pour {url}: {e}")
+                return None
+            except httpx.HTTPError as e:
+                print(f"Erreur HTTP pour {url}: {e}")
+                return None
+        return None
+
+    async def _scrape_feed_async(self, client, rss_url, site_domain, strategy=PAGE_FIRST):
+        """
+        Scrape un flux RSS : téléchargement, parsing puis articles en parallèle.
+        Une erreur n'interrompt que ce flux, dont les validateurs ne sont pas enregistrés.
+        """
+        # rss_parse couvre téléchargement + parsing, comme feedparser.parse(url) en mode sync
+        start = time.perf_counter()
+        try:
+            response = await self._fetch(client, rss_url, self.rss_parser.conditional_headers(rss_url))
+            if response is None:
+                return
+            if response.status_code == 304:
+                self.stats.observe('rss_parse', time.perf_counter() - start, domain=site_domain)
+                self.rss_parser.mark_not_modified(rss_url)
+                return
+            # Parsing hors de la boucle : un gros flux ne bloque pas les autres requêtes
+            feed = await asyncio.to_thread(feedparser.parse, response.content)
+            articles = self.rss_parser.parse_entries(feed, rss_url)
+            self.stats.observe('rss_parse', time.perf_counter() - start, domain=site_domain)
+            articles = await asyncio.to_thread(self._new_articles, articles)
+            self.rss_parser.remember(rss_url, response.headers.get("etag"), response.headers.get("last-modified"))
+        except Exception as e:
+            print(f"Erreur parsing RSS {rss_url}: {e}")
+            self._failed_feeds.add(rss_url)
+            return
+
+        print(f"{site_domain}: {len(articles)} articles dans {rss_url}")
+        try:
+            await asyncio.gather(*(
+                self._scrape_article_async(client, article, site_domain, strategy) for article in articles
+            ))
+        except BaseException:
+            # Run interrompu avant la fin des articles : le flux sera relu
+            self._failed_feeds.add(rss_url)
+            raise
+
+    async def _scrape_article_async(self, client, article, site_domain, strategy=PAGE_FIRST):
+        """
+        Télécharge et extrait un article ; extraction et sauvegarde (secours RSS,
+        recherche de quasi-doublons, écriture groupée) tournent hors de la boucle.
+        La place du domaine est gardée jusqu'à la fin de l'extraction : le nombre
+        de pages HTML en mémoire reste borné par la concurrence par domaine.
+        """
+        self._count('total', article, site_domain)
+        try:
+            content = await asyncio.to_thread(self._content_from_feed, article, strategy)
+            if content:
+                await asyncio.to_thread(self._store_article, article, content, site_domain)
+                return
+            async with self.throttle.slot(urlparse(article['url']).netloc):
+                start = time.perf_counter()
+                response = await self._request(client, article['url'])
+                self.stats.observe('page_fetch', time.perf_counter() - start, domain=site_domain)
+                if response is None:
+                    self._mark_feed_failed(article)
+                else:
+                    content = await asyncio.to_thread(
+                        self.extractor.extract_from_html, response.text, article['url']
+                    )
+            await asyncio.to_thread(self._store_article, article, content, site_domain)
+        except Exception as e:
+            self._count('extraction_failed', article, site_domain)
+            print(f"  [Erreur] {article['url']}: {e}")
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark de ContentExtractor.clean_text sur des articles stockés.
+Compare l'ancienne implémentation (une regex par pattern + re.sub final)
+au NoiseFilter, et vérifie que les deux produisent le même texte.
+
+Usage : python -m src.scraper.bench_clean_text [--limit 2000] [--repeat 5]
+"""
+import re
+import time
+import argparse
+
+from pymongo import MongoClient
+
+from src.scraper.scrape import Config, ContentExtractor
+
+
+def legacy_clean_text(text, compiled_patterns):
+    """Implémentation d'origine, conservée comme référence"""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if any(pattern.search(line) for pattern in compiled_patterns):
+            continue
+        lines.append(line)
+    cleaned = "\n".join(lines)
+    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    return cleaned.strip()
+
+
+def load_texts(limit):
+    client = MongoClient(Config.MONGO_URI)
+    cursor = client[Config.MONGO_DB]["articles"].find(
+        {"content": {"$nin": [None, ""]}}, {"content": 1, "_id": 0}
+    ).limit(limit)
+    texts = [doc["content"] for doc in cursor]
+    client.close()
+    return texts
+
+
+def best_of(func, texts, repeat):
+    """Meilleur temps (s) sur repeat passes complètes"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de clean_text sur les articles stockés.")
+    parser.add_argument("--limit", type=int, default=2000, help="Nombre d'articles lus")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de passes (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    texts = load_texts(args.limit)
+    if not texts:
+        print("Aucun article dans la base.")
+        return
+
+    extractor = ContentExtractor(http_client=None)
+    legacy_patterns = [re.compile(p, re.IGNORECASE) for p in ContentExtractor.NOISE_PATTERNS]
+
+    mismatches = sum(
+        1 for text in texts if legacy_clean_text(text, legacy_patterns) != extractor.clean_text(text)
+    )
+
+    t_legacy = best_of(lambda t: legacy_clean_text(t, legacy_patterns), texts, args.repeat)
+    t_filter = best_of(extractor.clean_text, texts, args.repeat)
+    n_chars = sum(len(t) for t in texts)
+
+    print("\n=== Benchmark clean_text ===")
+    print(f"Articles: {len(texts)} ({n_chars / 1e6:.1f} M caractères), meilleur de {args.repeat}")
+    print(f"Ancienne version: {t_legacy * 1000:.1f} ms ({t_legacy / len(texts) * 1e6:.1f} µs/article)")
+    print(f"NoiseFilter:      {t_filter * 1000:.1f} ms ({t_filter / len(texts) * 1e6:.1f} µs/article)")
+    print(f"Accélération: x{t_legacy / t_filter:.2f}")
+    print(f"Sorties différentes: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Extraction trafilatura déportée dans un pool de processus.
+Le parsing lxml est CPU-bound et garde le GIL : l'exécuter dans des
+processus séparés libère les threads (ou la boucle asyncio) qui téléchargent.
+Un sémaphore borne le nombre de pages HTML en cours de traitement pour que
+la mémoire ne gonfle pas si le téléchargement va plus vite que l'extraction.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+EXTRACT_PROCESSES = int(os.getenv("SCRAPER_EXTRACT_PROCESSES", "0"))  # 0 = extraction dans le thread courant
+
+# Extracteur propre à chaque processus du pool (créé au premier appel)
+_worker_extractor = None
+
+
+def extract_and_clean(html, url, include_tables):
+    """Exécuté dans un processus du pool : trafilatura puis nettoyage, retourne (texte, durées)"""
+    global _worker_extractor
+    if _worker_extractor is None:
+        from src.scraper.scrape import ContentExtractor
+        _worker_extractor = ContentExtractor(http_client=None)
+    return _worker_extractor.extract_text(html, url, include_tables)
+
+
+class ExtractionPool:
+    """Pool de processus d'extraction avec contre-pression sur les soumissions"""
+
+    def __init__(self, processes=EXTRACT_PROCESSES, max_in_flight=None):
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(max_workers=processes)
+        self._slots = threading.BoundedSemaphore(max_in_flight or processes * 2)
+
+    def submit(self, html, url, include_tables=False):
+        """Soumet une page ; bloque tant que max_in_flight pages sont en cours"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(extract_and_clean, html, url, include_tables)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def extract(self, html, url, include_tables=False):
+        """Extrait le texte nettoyé d'une page (appel bloquant), retourne (texte, durées)"""
+        return self.submit(html, url, include_tables).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
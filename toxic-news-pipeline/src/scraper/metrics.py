@@ -0,0 +1,65 @@
+"""
+Métriques d'un run de scraping : histogrammes de latence par étape.
+Les bornes sont fixes (en secondes) pour que les runs stockés dans
+scrape_runs restent comparables entre eux.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Étapes mesurées (rss_parse inclut le téléchargement du flux)
+STAGES = ('rss_parse', 'page_fetch', 'extract', 'clean', 'mongo_write')
+
+# Bornes supérieures des buckets, en secondes (le dernier bucket est +Inf)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class LatencyHistogram:
+    """Histogramme cumulatif simple : nombre, somme, max et comptes par bucket"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Borne supérieure du bucket contenant le quantile q (estimation)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self):
+        buckets = {f"le_{bound:g}": n for bound, n in zip(LATENCY_BUCKETS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+@contextmanager
+def timed(observe, stage, **labels):
+    """Mesure la durée du bloc et la transmet à observe(stage, secondes, **labels)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, **labels)
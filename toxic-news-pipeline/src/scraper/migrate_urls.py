@@ -0,0 +1,113 @@
+"""
+Migration : canonicalise les URLs des articles déjà stockés et fusionne les doublons.
+Pour chaque URL canonique, un seul article est conservé (celui dont l'URL est
+déjà canonique, sinon le plus ancien) ; les autres sont supprimés avec leurs
+prédictions, et l'URL de l'article conservé (et de sa prédiction) est réécrite.
+Les liens de quasi-doublons (articles.duplicate_of, predictions.reused_from)
+qui visent une variante renommée ou supprimée sont redirigés vers l'URL canonique.
+
+Usage : python -m src.scraper.migrate_urls [--dry-run]
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import MongoClient
+
+from src.scraper.scrape import Config
+from src.scraper.urls import canonicalize_url
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _fetched_at(doc):
+    value = doc.get("fetched_at") or _EPOCH
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def group_by_canonical(articles):
+    """Regroupe les articles (url, fetched_at, _id) par URL canonique"""
+    groups = defaultdict(list)
+    for doc in articles.find({}, {"url": 1, "fetched_at": 1}):
+        groups[canonicalize_url(doc["url"])].append(doc)
+    return groups
+
+
+def rewrite_links(articles, predictions, aliases, canonical, dry_run=False):
+    """Redirige duplicate_of / reused_from des URLs aliases vers canonical ; retourne le nombre de liens"""
+    links = [
+        (articles, "duplicate_of"),
+        (predictions, "reused_from"),
+    ]
+    count = 0
+    for collection, field in links:
+        query = {field: {"$in": aliases}}
+        if dry_run:
+            count += collection.count_documents(query)
+        else:
+            count += collection.update_many(query, {"$set": {field: canonical}}).modified_count
+    if not dry_run:
+        # L'article conservé ne peut pas être son propre quasi-doublon
+        articles.update_one({"url": canonical, "duplicate_of": canonical}, {"$set": {"duplicate_of": None}})
+    return count
+
+
+def migrate(dry_run=False):
+    client = MongoClient(Config.MONGO_URI)
+    db = client[Config.MONGO_DB]
+    articles, predictions = db["articles"], db["predictions"]
+
+    stats = {"groups": 0, "renamed": 0, "duplicates_removed": 0, "predictions_removed": 0,
+             "links_rewritten": 0}
+
+    for canonical, docs in group_by_canonical(articles).items():
+        # Conserve l'article déjà canonique, sinon le plus ancien
+        docs.sort(key=lambda d: (d["url"] != canonical, _fetched_at(d)))
+        keeper, duplicates = docs[0], docs[1:]
+        if not duplicates and keeper["url"] == canonical:
+            continue
+        stats["groups"] += 1
+
+        if duplicates:
+            duplicate_urls = [d["url"] for d in duplicates]
+            print(f"[Doublons] {canonical} ← {len(duplicates)} variante(s)")
+            stats["duplicates_removed"] += len(duplicates)
+            if not dry_run:
+                articles.delete_many({"_id": {"$in": [d["_id"] for d in duplicates]}})
+                removed = predictions.delete_many({"url": {"$in": duplicate_urls}})
+                stats["predictions_removed"] += removed.deleted_count
+
+        if keeper["url"] != canonical:
+            stats["renamed"] += 1
+            if not dry_run:
+                articles.update_one(
+                    {"_id": keeper["_id"]},
+                    {"$set": {"url": canonical, "metadata.original_url": keeper["url"]}}
+                )
+                predictions.update_many({"url": keeper["url"]}, {"$set": {"url": canonical}})
+
+        # Variantes renommées ou supprimées : leurs liens pointent désormais vers l'URL canonique
+        aliases = [d["url"] for d in docs if d["url"] != canonical]
+        if aliases:
+            stats["links_rewritten"] += rewrite_links(articles, predictions, aliases, canonical, dry_run)
+
+    client.close()
+
+    print("\n=== Résumé de la migration ===" + (" (dry-run)" if dry_run else ""))
+    print(f"URLs canoniques concernées: {stats['groups']}")
+    print(f"Articles renommés: {stats['renamed']}")
+    print(f"Doublons supprimés: {stats['duplicates_removed']}")
+    print(f"Prédictions de doublons supprimées: {stats['predictions_removed']}")
+    print(f"Liens de quasi-doublons redirigés: {stats['links_rewritten']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canonicalise les URLs stockées et fusionne les doublons.")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche les changements sans écrire")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Détection des quasi-doublons (dépêches reprises par plusieurs sites).
+Chaque article reçoit une signature MinHash (64 permutations) calculée sur
+des shingles de mots. La signature est découpée en 16 bandes de 4 valeurs
+indexées dans MongoDB (LSH) : seuls les articles partageant au moins une
+bande sont comparés, puis la similarité de Jaccard estimée est vérifiée.
+"""
+import os
+import re
+import zlib
+import hashlib
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))  # Jaccard estimé minimal
+MAX_CANDIDATES = 50
+
+_PRIME = np.uint64(4294967291)  # Plus grand premier < 2^32 : a*x + b tient sur 64 bits
+_rng = np.random.RandomState(20240601)  # Graine fixe : les signatures stockées restent comparables
+_A = _rng.randint(1, 2 ** 32 - 5, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32 - 5, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingles(text):
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """Signature MinHash du texte (liste de NUM_PERM entiers < 2^32)"""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in _shingles(text)), dtype=np.uint64
+    ) % _PRIME
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return permuted.min(axis=0).tolist()
+
+
+def bands(signature):
+    """Clés LSH indexables de la signature (« numéro:hash de la bande »)"""
+    keys = []
+    for i in range(BANDS):
+        rows = ",".join(str(v) for v in signature[i * ROWS:(i + 1) * ROWS])
+        keys.append(f"{i}:{hashlib.blake2b(rows.encode(), digest_size=6).hexdigest()}")
+    return keys
+
+
+def similarity(a, b):
+    """Jaccard estimé : proportion de valeurs MinHash égales"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """Index LSH adossé à la collection articles (+ articles vus pendant le run)"""
+
+    def __init__(self, collection, threshold=THRESHOLD):
+        self.collection = collection
+        self.threshold = threshold
+        # Articles du run pas encore écrits en base : bande -> [(signature, url)]
+        self._pending = defaultdict(list)
+        self._lock = threading.Lock()
+        self._create_index()
+
+    def _create_index(self):
+        try:
+            self.collection.create_index("minhash_bands")
+        except Exception as e:
+            print(f"Warning: Index creation failed - {e}")
+
+    def fingerprint(self, text):
+        """Retourne (signature, bandes) à stocker sur l'article"""
+        signature = minhash(text)
+        return signature, bands(signature)
+
+    def find_original(self, signature, signature_bands):
+        """URL de l'article original le plus proche au-dessus du seuil, sinon None"""
+        candidates = []
+        with self._lock:
+            for band in signature_bands:
+                candidates.extend(self._pending.get(band, []))
+        try:
+            cursor = self.collection.find(
+                {"minhash_bands": {"$in": signature_bands}, "duplicate_of": None},
+                {"url": 1, "minhash": 1, "_id": 0}
+            ).limit(MAX_CANDIDATES)
+            candidates.extend((doc["minhash"], doc["url"]) for doc in cursor)
+        except Exception as e:
+            print(f"Warning: near-duplicate lookup failed - {e}")
+
+        best = None
+        for candidate, url in candidates:
+            score = similarity(signature, candidate)
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, url)
+        return best[1] if best else None
+
+    def add(self, signature, signature_bands, url):
+        """Enregistre un article original du run (avant son écriture en base)"""
+        with self._lock:
+            for band in signature_bands:
+                self._pending[band].append((signature, url))
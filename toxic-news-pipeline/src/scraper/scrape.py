@@ -5,17 +5,28 @@ Collecte des articles via RSS et extraction du contenu textuel.
 import os
 import re
 import time
+import argparse
+import json
 import calendar
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
 from urllib.parse import urlparse
 
 import feedparser
 import requests
 import trafilatura
-from pymongo import MongoClient, errors
+from pymongo import MongoClient
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from src.scraper.urls import canonicalize_url
+from src.scraper.near_duplicates import NearDuplicateIndex
+from src.scraper.extraction import ExtractionPool, EXTRACT_PROCESSES
+from src.scraper.metrics import LatencyHistogram, timed
+from src.storage.bulk import BulkWriter, INSERTED, MATCHED, DUPLICATE
+
 
 # ============================================================================
 # CONFIGURATION
@@ -33,10 +44,24 @@ class Config:
     SLEEP_TIME = float(os.getenv("SCRAPER_POLITE_SLEEP", "0.15"))
     MAX_AGE_DAYS = int(os.getenv("SCRAPER_MAX_AGE_DAYS", "30"))
     
+    # Modes concurrents : concurrence globale (async) et politesse par domaine
+    ENGINE = os.getenv("SCRAPER_ENGINE", "sync")
+    CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "32"))
+    PER_DOMAIN_CONCURRENCY = int(os.getenv("SCRAPER_PER_DOMAIN_CONCURRENCY", "2"))
+    DOMAIN_DELAY = float(os.getenv("SCRAPER_DOMAIN_DELAY", str(SLEEP_TIME)))
+    
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB = os.getenv("MONGO_DB", "toxic_news")
+    
+    # Export JSON des métriques du run (vide = collection scrape_runs uniquement)
+    METRICS_JSON = os.getenv("SCRAPER_METRICS_JSON", "")
 
 
+# Stratégies d'extraction d'un flux
+PAGE_FIRST = "page_first"  # Page web d'abord, contenu RSS en secours
+RSS_FIRST = "rss_first"    # Contenu RSS d'abord ; la page n'est téléchargée que s'il est incomplet
+
+# Un flux est une URL (stratégie PAGE_FIRST) ou un tuple (URL, stratégie)
 RSS_SOURCES = {
     "https://www.humanite.fr/": [
         "https://www.humanite.fr/rss.xml",
@@ -55,12 +80,12 @@ RSS_SOURCES = {
     ],
     "https://www.lemonde.fr/": [
         "https://www.lemonde.fr/rss/une.xml",
-        "https://www.lemonde.fr/international/rss_full.xml",
-        "https://www.lemonde.fr/economie/rss_full.xml",
-        "https://www.lemonde.fr/politique/rss_full.xml",
-        "https://www.lemonde.fr/culture/rss_full.xml",
-        "https://www.lemonde.fr/sciences/rss_full.xml",
-        "https://www.lemonde.fr/societe/rss_full.xml",
+        ("https://www.lemonde.fr/international/rss_full.xml", RSS_FIRST),
+        ("https://www.lemonde.fr/economie/rss_full.xml", RSS_FIRST),
+        ("https://www.lemonde.fr/politique/rss_full.xml", RSS_FIRST),
+        ("https://www.lemonde.fr/culture/rss_full.xml", RSS_FIRST),
+        ("https://www.lemonde.fr/sciences/rss_full.xml", RSS_FIRST),
+        ("https://www.lemonde.fr/societe/rss_full.xml", RSS_FIRST),
     ],
     "https://www.france24.com/fr/": [
         "https://www.france24.com/fr/rss",
@@ -84,6 +109,20 @@ RSS_SOURCES = {
 }
 
 
+def get_domain(url):
+    """Domaine d'une URL, sans www."""
+    return urlparse(url).netloc.replace('www.', '')
+
+
+def iter_feeds(rss_feeds):
+    """Itère sur les flux d'un site sous la forme (url, stratégie)"""
+    for feed in rss_feeds:
+        if isinstance(feed, str):
+            yield feed, PAGE_FIRST
+        else:
+            yield feed
+
+
 
 # ============================================================================
 # BASE DE DONNÉES
@@ -92,11 +131,18 @@ RSS_SOURCES = {
 class Database:
     """Gestion de la connexion et des opérations MongoDB"""
     
-    def __init__(self):
+    def __init__(self, on_save=None, on_flush=None):
         self.client = MongoClient(Config.MONGO_URI)
         self.db = self.client[Config.MONGO_DB]
         self.articles = self.db["articles"]
+        self.runs = self.db["scrape_runs"]
         self._create_index()
+        self.feed_states = FeedStateStore(self.db["feed_state"])
+        self.near_duplicates = NearDuplicateIndex(self.articles)
+        # Écritures groupées ; on_save(article, saved, error) est appelé au vidage du tampon,
+        # on_flush(nb_articles, secondes) après chaque bulk_write
+        self.on_save = on_save
+        self.writer = BulkWriter(self.articles, on_result=self._on_write_result, on_flush=on_flush)
     
     def _create_index(self):
         """Crée un index unique sur l'URL pour éviter les doublons"""
@@ -106,12 +152,72 @@ class Database:
             print(f"Warning: Index creation failed - {e}")
     
     def save_article(self, article_data):
-        """Sauvegarde un article, retourne True si succès"""
+        """Met l'article en file d'écriture (upsert sur l'URL, sans écraser l'existant)"""
+        self.writer.upsert(
+            {"url": article_data["url"]},
+            {"$setOnInsert": article_data},
+            context=article_data
+        )
+    
+    def known_urls(self, urls):
+        """Retourne, en une requête, les URLs déjà présentes dans la collection"""
+        if not urls:
+            return set()
+        cursor = self.articles.find({"url": {"$in": list(urls)}}, {"url": 1, "_id": 0})
+        return {doc["url"] for doc in cursor}
+    
+    def flush(self):
+        """Envoie les articles encore en attente d'écriture"""
+        self.writer.flush()
+    
+    def save_run(self, report):
+        """Enregistre le rapport de métriques d'un run dans scrape_runs"""
         try:
-            self.articles.insert_one(article_data)
-            return True
-        except errors.DuplicateKeyError:
-            return False
+            self.runs.insert_one(dict(report))
+        except Exception as e:
+            print(f"Warning: run metrics not saved - {e}")
+    
+    def _on_write_result(self, article_data, outcome, error):
+        """Traduit le résultat d'écriture : True = sauvegardé, False = doublon"""
+        if self.on_save is None:
+            return
+        if outcome == INSERTED:
+            self.on_save(article_data, True, None)
+        elif outcome in (MATCHED, DUPLICATE):
+            self.on_save(article_data, False, None)
+        else:
+            self.on_save(article_data, False, error)
+
+
+class FeedStateStore:
+    """Validateurs HTTP (ETag / Last-Modified) de chaque flux RSS, persistés dans MongoDB"""
+    
+    def __init__(self, collection):
+        self.collection = collection
+        self._lock = threading.Lock()
+        try:
+            self._states = {doc["_id"]: doc for doc in collection.find({})}
+        except Exception as e:
+            print(f"Warning: feed state unavailable - {e}")
+            self._states = {}
+    
+    def get(self, rss_url):
+        """Retourne {'etag': ..., 'modified': ...} connus pour le flux"""
+        with self._lock:
+            state = self._states.get(rss_url, {})
+        return {"etag": state.get("etag"), "modified": state.get("modified")}
+    
+    def update(self, rss_url, etag, modified):
+        """Mémorise les validateurs renvoyés par le serveur"""
+        if not etag and not modified:
+            return
+        state = {"etag": etag, "modified": modified, "checked_at": datetime.now(timezone.utc)}
+        with self._lock:
+            self._states[rss_url] = state
+        try:
+            self.collection.update_one({"_id": rss_url}, {"$set": state}, upsert=True)
+        except Exception as e:
+            print(f"Warning: feed state not saved for {rss_url} - {e}")
 
 
 # ============================================================================
@@ -122,7 +228,15 @@ class HTTPClient:
     """Client HTTP avec retry et headers appropriés"""
     
     def __init__(self):
-        self.session = self._create_session()
+        # Une session par thread : requests.Session n'est pas garanti thread-safe
+        self._local = threading.local()
+    
+    @property
+    def session(self):
+        """Session HTTP du thread courant (créée à la demande)"""
+        if not hasattr(self._local, "session"):
+            self._local.session = self._create_session()
+        return self._local.session
     
     def _create_session(self):
         """Crée une session avec retry automatique"""
@@ -162,6 +276,98 @@ class HTTPClient:
 # EXTRACTION DE CONTENU
 # ============================================================================
 
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _has_top_level_alternation(pattern):
+    """Vrai si la regex contient un | hors de tout groupe et de toute classe"""
+    depth, in_class, escaped = 0, False, False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _literal_prefix(pattern):
+    """
+    Préfixe littéral (en minuscules) que toute ligne correspondant à la regex
+    contient, '' s'il n'y en a pas (alternative de premier niveau, groupe initial)
+    """
+    if _has_top_level_alternation(pattern):
+        return ""
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_META:
+            # Un quantificateur rend le caractère précédent optionnel
+            if char in "*?{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix).lower()
+
+
+class NoiseFilter:
+    """
+    Détecte les lignes de bruit en une passe.
+    Les patterns ancrés (^...) sont fusionnés en une regex testée par match() en
+    début de ligne, les autres en une regex testée par search(). Chaque regex
+    n'est évaluée que si la ligne contient l'un des préfixes littéraux des
+    patterns (startswith / sous-chaîne), ce qui écarte la plupart des lignes
+    de texte courant sans passer par le moteur de regex.
+    Les patterns commençant par une construction (?...) autre que (?:
+    (drapeaux en ligne, groupes nommés) ne peuvent pas être fusionnés : ils
+    sont compilés seuls et toujours évalués.
+    """
+    
+    def __init__(self, patterns):
+        standalone = [p for p in patterns if p.startswith("(?") and not p.startswith("(?:")]
+        mergeable = [p for p in patterns if p not in standalone]
+        # "^a|b" ne peut pas perdre son ^ : la branche b n'est pas ancrée
+        anchored = [p[1:] for p in mergeable if p.startswith("^") and not _has_top_level_alternation(p)]
+        floating = [p for p in mergeable if not p.startswith("^") or _has_top_level_alternation(p)]
+        self._standalone = [re.compile(p, re.IGNORECASE) for p in standalone]
+        self._anchored = self._compile(anchored)
+        self._floating = self._compile(floating)
+        self._anchored_prefixes = self._prefixes(anchored)
+        self._floating_prefixes = self._prefixes(floating)
+    
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+    
+    @staticmethod
+    def _prefixes(patterns):
+        """Préfixes littéraux, ou None si un pattern n'en a pas (regex toujours évaluée)"""
+        prefixes = tuple(_literal_prefix(p) for p in patterns)
+        return None if not all(prefixes) else prefixes
+    
+    def matches(self, line):
+        low = line.lower()
+        if self._anchored is not None:
+            if self._anchored_prefixes is None or low.startswith(self._anchored_prefixes):
+                if self._anchored.match(line):
+                    return True
+        if self._floating is not None:
+            if self._floating_prefixes is None or any(p in low for p in self._floating_prefixes):
+                if self._floating.search(line):
+                    return True
+        return any(pattern.search(line) for pattern in self._standalone)
+
+
 class ContentExtractor:
     """Extraction et nettoyage du contenu des articles"""
     
@@ -177,65 +383,112 @@ class ContentExtractor:
         r"^-\s*$",                       
     ]
     
-    def __init__(self, http_client):
+    # Fins de texte signalant un contenu RSS tronqué (chapô, teaser)
+    TRUNCATION_PATTERN = re.compile(
+        r"(\.\.\.|…|\[…\]|\[\.\.\.\]|lire la suite|read more|continuer la lecture)\W*$",
+        re.IGNORECASE
+    )
+    
+    # Patterns supplémentaires propres à un site (domaine sans www.)
+    SITE_NOISE_PATTERNS = {
+        "lemonde.fr": [
+            r"^Article réservé aux abonnés$",
+            r"^Vous pouvez lire Le Monde sur un seul appareil.*$",
+        ],
+        "lepoint.fr": [
+            r"^Abonnez-vous.*$",
+        ],
+    }
+    
+    def __init__(self, http_client, pool=None, stats=None):
         self.http_client = http_client
-        self.compiled_patterns = [
-            re.compile(p, re.IGNORECASE) for p in self.NOISE_PATTERNS
-        ]
+        # Pool de processus optionnel pour trafilatura (voir src.scraper.extraction)
+        self.pool = pool
+        # ScrapeStats optionnel recevant les durées des étapes extract et clean
+        self.stats = stats
+        self.site_patterns = {site: list(patterns) for site, patterns in self.SITE_NOISE_PATTERNS.items()}
+        # Un filtre compilé par site, construit à la demande
+        self._noise_filters = {}
+    
+    def register_noise_patterns(self, site, patterns):
+        """
+        Ajoute des patterns de bruit pour un site.
+        Les workers du pool d'extraction n'utilisent que SITE_NOISE_PATTERNS.
+        """
+        self.site_patterns.setdefault(site, []).extend(patterns)
+        self._noise_filters.pop(site, None)
+    
+    def _noise_filter(self, site=None):
+        """Filtre regroupant les patterns communs et ceux du site"""
+        noise_filter = self._noise_filters.get(site)
+        if noise_filter is None:
+            noise_filter = NoiseFilter(self.NOISE_PATTERNS + self.site_patterns.get(site, []))
+            self._noise_filters[site] = noise_filter
+        return noise_filter
     
     def extract_from_url(self, url):
         """Extrait le contenu textuel d'une URL"""
         response = self.http_client.get(url)
         if not response:
             return None
-        
-        # Extraction avec trafilatura
-        text = trafilatura.extract(
-            response.text,
-            include_comments=False,
-            include_tables=False,
-            url=url
-        )
-        
-        if text:
-            return self.clean_text(text)
-        return None
+        return self.extract_from_html(response.text, url)
+    
+    def extract_from_html(self, html, url):
+        """Extrait le contenu textuel du HTML d'une page déjà téléchargée"""
+        return self._extract(html, url, include_tables=False)
     
     def extract_from_rss_content(self, html_content, url):
         """Extrait le contenu depuis le HTML du flux RSS"""
         if not html_content:
             return None
-        
+        return self._extract(html_content, url, include_tables=True)
+    
+    def is_complete(self, text):
+        """Vrai si le texte est assez long et ne se termine pas par une marque de troncature"""
+        if not text or len(text) < Config.MIN_CHARS:
+            return False
+        return not self.TRUNCATION_PATTERN.search(text[-100:])
+    
+    def _extract(self, html, url, include_tables):
+        """Délègue au pool de processus s'il existe, sinon extrait sur place"""
+        if self.pool is not None:
+            text, timings = self.pool.extract(html, url, include_tables)
+        else:
+            text, timings = self.extract_text(html, url, include_tables)
+        if self.stats is not None:
+            for stage, seconds in timings.items():
+                self.stats.observe(stage, seconds, domain=get_domain(url))
+        return text
+    
+    def extract_text(self, html, url, include_tables):
+        """
+        Extraction trafilatura puis nettoyage du texte.
+        Retourne (texte, durées en secondes des étapes extract et clean).
+        """
+        start = time.perf_counter()
         text = trafilatura.extract(
-            html_content,
+            html,
             include_comments=False,
+            include_tables=include_tables,
             url=url
         )
         
-        if text:
-            return self.clean_text(text)
-        return None
+        timings = {'extract': time.perf_counter() - start}
+        if not text:
+            return None, timings
+        start = time.perf_counter()
+        text = self.clean_text(text, site=get_domain(url))
+        timings['clean'] = time.perf_counter() - start
+        return text, timings
     
-    def clean_text(self, text):
-        """Nettoie le texte extrait"""
+    def clean_text(self, text, site=None):
+        """Nettoie le texte extrait (lignes vides et lignes de bruit supprimées)"""
         if not text:
             return text
         
-        # Supprime les lignes de bruit
-        lines = []
-        for line in text.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            # Vérifie si la ligne correspond à un pattern de bruit
-            if any(pattern.search(line) for pattern in self.compiled_patterns):
-                continue
-            lines.append(line)
-        
-        # Rejoint et nettoie les espaces multiples
-        cleaned = "\n".join(lines)
-        cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
-        return cleaned.strip()
+        noise = self._noise_filter(site).matches
+        stripped = (line.strip() for line in text.splitlines())
+        return "\n".join(line for line in stripped if line and not noise(line))
 
 
 # ============================================================================
@@ -245,34 +498,87 @@ class ContentExtractor:
 class RSSParser:
     """Parse les flux RSS et extrait les métadonnées"""
     
-    def __init__(self):
+    def __init__(self, feed_states=None, stats=None):
         self.cutoff_date = datetime.now(timezone.utc) - timedelta(days=Config.MAX_AGE_DAYS)
+        # GET conditionnel : validateurs des flux et compteur des flux inchangés
+        self.feed_states = feed_states
+        self.stats = stats
+        # Validateurs reçus pendant le run, enregistrés par commit_validators
+        self._pending_validators = {}
+        self._pending_lock = threading.Lock()
     
     def parse_feed(self, rss_url):
-        """Parse un flux RSS et retourne les articles récents"""
+        """Parse un flux RSS et retourne les articles récents (aucun si le flux n'a pas changé)"""
         try:
-            feed = feedparser.parse(rss_url)
-            articles = []
-            
-            for entry in feed.entries[:Config.MAX_PER_FEED]:
-                article = self._extract_entry_data(entry, rss_url)
-                
-                # Filtre par date si disponible
-                if article['published_at']:
-                    if article['published_at'] < self.cutoff_date:
-                        continue
-                
-                articles.append(article)
-            
+            state = self.feed_states.get(rss_url) if self.feed_states else {}
+            feed = feedparser.parse(rss_url, etag=state.get("etag"), modified=state.get("modified"))
+            if feed.get("status") == 304:
+                self.mark_not_modified(rss_url)
+                return []
+            articles = self.parse_entries(feed, rss_url)
+            self.remember(rss_url, feed.get("etag"), feed.get("modified"))
             return articles
         except Exception as e:
             print(f"Erreur parsing RSS {rss_url}: {e}")
             return []
     
+    def conditional_headers(self, rss_url):
+        """En-têtes If-None-Match / If-Modified-Since pour un GET conditionnel"""
+        state = self.feed_states.get(rss_url) if self.feed_states else {}
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("modified"):
+            headers["If-Modified-Since"] = state["modified"]
+        return headers
+    
+    def remember(self, rss_url, etag, modified):
+        """
+        Note les validateurs d'une réponse 200. Ils ne sont enregistrés qu'une
+        fois les articles du flux sauvegardés (commit_validators) : après un
+        crash en cours de flux, le prochain run ne doit pas recevoir de 304.
+        """
+        with self._pending_lock:
+            self._pending_validators[rss_url] = (etag, modified)
+    
+    def commit_validators(self, skip=()):
+        """Enregistre les validateurs notés, sauf ceux des flux de skip (articles en échec)"""
+        with self._pending_lock:
+            pending, self._pending_validators = self._pending_validators, {}
+        if not self.feed_states:
+            return
+        for rss_url, (etag, modified) in pending.items():
+            if rss_url not in skip:
+                self.feed_states.update(rss_url, etag, modified)
+    
+    def mark_not_modified(self, rss_url):
+        """Flux inchangé depuis la dernière visite (réponse 304)"""
+        print(f"  [Inchangé] {rss_url}")
+        if self.stats:
+            self.stats.incr('feeds_not_modified', domain=get_domain(rss_url), feed=rss_url)
+    
+    def parse_entries(self, feed, rss_url):
+        """Extrait les articles récents d'un flux déjà parsé par feedparser"""
+        articles = []
+        
+        for entry in feed.entries[:Config.MAX_PER_FEED]:
+            article = self._extract_entry_data(entry, rss_url)
+            
+            # Filtre par date si disponible
+            if article['published_at']:
+                if article['published_at'] < self.cutoff_date:
+                    continue
+            
+            articles.append(article)
+        
+        return articles
+    
     def _extract_entry_data(self, entry, rss_url):
         """Extrait les données d'une entrée RSS"""
+        link = entry.get('link', '')
         return {
-            'url': entry.get('link', ''),
+            'url': link,
+            'canonical_url': canonicalize_url(link),
             'title': entry.get('title', ''),
             'summary': entry.get('summary', ''),
             'content_html': self._get_content_html(entry),
@@ -302,6 +608,82 @@ class RSSParser:
         return None
 
 
+# ============================================================================
+# STATISTIQUES
+# ============================================================================
+
+class ScrapeStats:
+    """
+    Compteurs du scraping (globaux, par domaine et par flux) et histogrammes
+    de latence par étape (voir src.scraper.metrics), partageables entre threads
+    """
+    
+    FIELDS = ('total', 'success', 'too_short', 'extraction_failed', 'saved',
+              'feeds_not_modified', 'already_known', 'near_duplicates', 'from_feed')
+    
+    def __init__(self):
+        self._counts = Counter({field: 0 for field in self.FIELDS})
+        self._domain_counts = defaultdict(Counter)
+        self._feed_counts = defaultdict(Counter)
+        self._latency = defaultdict(LatencyHistogram)
+        self._domain_latency = defaultdict(lambda: defaultdict(LatencyHistogram))
+        self._lock = threading.Lock()
+    
+    def incr(self, field, amount=1, domain=None, feed=None):
+        with self._lock:
+            self._counts[field] += amount
+            if domain:
+                self._domain_counts[domain][field] += amount
+            if feed:
+                self._feed_counts[feed][field] += amount
+    
+    def observe(self, stage, seconds, domain=None):
+        """Enregistre la durée d'une étape, globalement et pour le domaine"""
+        with self._lock:
+            self._latency[stage].observe(seconds)
+            if domain:
+                self._domain_latency[domain][stage].observe(seconds)
+    
+    def timer(self, stage, domain=None):
+        """Context manager mesurant la durée d'une étape"""
+        return timed(self.observe, stage, domain=domain)
+    
+    def __getitem__(self, field):
+        with self._lock:
+            return self._counts[field]
+    
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counts)
+    
+    def report(self):
+        """
+        Rapport sérialisable (JSON / MongoDB). Domaines et flux sont des listes :
+        leurs noms contiennent des points, interdits dans les clés MongoDB.
+        """
+        with self._lock:
+            domains = sorted(set(self._domain_counts) | set(self._domain_latency))
+            return {
+                'totals': dict(self._counts),
+                'latency': {stage: h.as_dict() for stage, h in self._latency.items()},
+                'domains': [
+                    {
+                        'domain': domain,
+                        'counts': dict(self._domain_counts.get(domain, {})),
+                        'latency': {
+                            stage: h.as_dict()
+                            for stage, h in self._domain_latency.get(domain, {}).items()
+                        },
+                    }
+                    for domain in domains
+                ],
+                'feeds': [
+                    {'feed': feed, 'domain': get_domain(feed), 'counts': dict(counts)}
+                    for feed, counts in sorted(self._feed_counts.items())
+                ],
+            }
+
+
 # ============================================================================
 # SCRAPER PRINCIPAL
 # ============================================================================
@@ -309,92 +691,277 @@ class RSSParser:
 class NewsScraper:
     """Orchestrateur principal du scraping"""
     
-    def __init__(self):
-        self.db = Database()
+    ENGINE = "sync"
+    
+    def __init__(self, workers=1, extract_processes=EXTRACT_PROCESSES, metrics_json=Config.METRICS_JSON):
+        self.workers = max(1, workers)
+        self.stats = ScrapeStats()
+        self.metrics_json = metrics_json
+        self.started_at = datetime.now(timezone.utc)
+        self.db = Database(on_save=self._on_article_saved, on_flush=self._on_articles_flushed)
         self.http_client = HTTPClient()
-        self.extractor = ContentExtractor(self.http_client)
-        self.rss_parser = RSSParser()
-        self.stats = {
-            'total': 0,
-            'success': 0,
-            'too_short': 0,
-            'extraction_failed': 0,
-            'saved': 0
-        }
+        self.extraction_pool = ExtractionPool(extract_processes) if extract_processes > 0 else None
+        self.extractor = ContentExtractor(self.http_client, pool=self.extraction_pool, stats=self.stats)
+        self.rss_parser = RSSParser(feed_states=self.db.feed_states, stats=self.stats)
+        # URLs déjà rencontrées pendant ce run (plusieurs flux peuvent partager un article)
+        self._seen_urls = set()
+        self._seen_urls_lock = threading.Lock()
+        # Flux dont un article a échoué : validateurs non enregistrés, flux relu au prochain run
+        self._failed_feeds = set()
+        # Un sémaphore par hôte pour borner les requêtes simultanées (mode --workers)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
     
     def scrape_all(self):
         """Lance le scraping de tous les sites"""
+        if self.workers > 1:
+            return self._scrape_all_threaded()
+        
         print("=== Début du scraping ===\n")
         
         for site_url, rss_feeds in RSS_SOURCES.items():
             site_domain = self._get_domain(site_url)
             print(f"Traitement de {site_domain}...")
             
-            for rss_url in rss_feeds:
-                self._scrape_feed(rss_url, site_domain)
+            for rss_url, strategy in iter_feeds(rss_feeds):
+                self._scrape_feed(rss_url, site_domain, strategy)
                 time.sleep(Config.SLEEP_TIME)
         
+        self._finish()
+    
+    def _finish(self):
+        """Vide les écritures en attente, arrête le pool d'extraction, affiche et enregistre les métriques"""
+        self.db.flush()
+        # Articles écrits : les flux peuvent désormais répondre 304 au prochain run
+        self.rss_parser.commit_validators(skip=self._failed_feeds)
+        if self.extraction_pool is not None:
+            self.extraction_pool.shutdown()
         self._print_summary()
+        self._save_run_report()
+    
+    def _run_report(self):
+        """Métriques du run : contexte, débit, compteurs et latences"""
+        finished_at = datetime.now(timezone.utc)
+        duration = (finished_at - self.started_at).total_seconds()
+        return {
+            'started_at': self.started_at,
+            'finished_at': finished_at,
+            'duration_s': round(duration, 3),
+            'engine': self.ENGINE,
+            'workers': self.workers,
+            'extract_processes': self.extraction_pool.processes if self.extraction_pool else 0,
+            'articles_per_second': round(self.stats['total'] / duration, 3) if duration else None,
+            **self.stats.report(),
+        }
     
-    def _scrape_feed(self, rss_url, site_domain):
+    def _save_run_report(self):
+        """Exporte le rapport en JSON (si demandé) et l'enregistre dans scrape_runs"""
+        report = self._run_report()
+        if self.metrics_json:
+            try:
+                with open(self.metrics_json, "w", encoding="utf-8") as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+                print(f"Métriques exportées: {self.metrics_json}")
+            except OSError as e:
+                print(f"Warning: metrics export failed - {e}")
+        self.db.save_run(report)
+    
+    def _scrape_all_threaded(self):
+        """Parse les flux puis extrait les articles dans un pool de threads"""
+        print(f"=== Début du scraping ({self.workers} workers) ===\n")
+        
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for site_url, rss_feeds in RSS_SOURCES.items():
+                site_domain = self._get_domain(site_url)
+                print(f"Traitement de {site_domain}...")
+                
+                for rss_url, strategy in iter_feeds(rss_feeds):
+                    with self.stats.timer('rss_parse', site_domain):
+                        articles = self.rss_parser.parse_feed(rss_url)
+                    for article in self._new_articles(articles):
+                        futures.append(pool.submit(self._scrape_article, article, site_domain, strategy))
+            wait(futures)
+        
+        self._finish()
+    
+    def _new_articles(self, articles):
+        """
+        Écarte, avant tout téléchargement, les articles déjà en base (une requête
+        $in par flux) ou déjà rencontrés dans un autre flux pendant ce run.
+        La comparaison se fait sur l'URL canonique.
+        """
+        urls = {article['canonical_url'] for article in articles}
+        try:
+            known = self.db.known_urls(urls)
+        except Exception as e:
+            print(f"Warning: URL lookup failed - {e}")
+            known = set()
+        
+        new_articles = []
+        with self._seen_urls_lock:
+            for article in articles:
+                if article['canonical_url'] in known or article['canonical_url'] in self._seen_urls:
+                    self._count('already_known', article)
+                    continue
+                self._seen_urls.add(article['canonical_url'])
+                new_articles.append(article)
+        return new_articles
+    
+    def _host_slot(self, url):
+        """Retourne le sémaphore de l'hôte de l'URL"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(Config.PER_DOMAIN_CONCURRENCY)
+            return self._host_slots[host]
+    
+    def _content_from_feed(self, article, strategy):
+        """
+        Stratégie RSS_FIRST : contenu du flux nettoyé, s'il est complet.
+        Retourne None s'il faut télécharger la page.
+        """
+        if strategy != RSS_FIRST or not article['content_html']:
+            return None
+        content = self.extractor.extract_from_rss_content(article['content_html'], article['url'])
+        # Conservé pour le secours de _store_article si la page échoue
+        article['rss_content'] = content
+        if not self.extractor.is_complete(content):
+            return None
+        self._count('from_feed', article)
+        return content
+    
+    def _scrape_article(self, article, site_domain, strategy=PAGE_FIRST):
+        """Extrait et sauvegarde un article (exécuté dans un thread du pool)"""
+        self._count('total', article, site_domain)
+        try:
+            content = self._content_from_feed(article, strategy)
+            if content:
+                self._store_article(article, content, site_domain)
+                return
+            # La pause de politesse est faite en gardant la place de l'hôte ;
+            # l'extraction se fait après l'avoir libérée
+            with self._host_slot(article['url']):
+                with self.stats.timer('page_fetch', site_domain):
+                    response = self.http_client.get(article['url'])
+                time.sleep(Config.SLEEP_TIME)
+            if response is None:
+                self._mark_feed_failed(article)
+            content = self.extractor.extract_from_html(response.text, article['url']) if response else None
+            self._store_article(article, content, site_domain)
+        except Exception as e:
+            self._count('extraction_failed', article, site_domain)
+            print(f"  [Erreur] {article['url']}: {e}")
+    
+    def _scrape_feed(self, rss_url, site_domain, strategy=PAGE_FIRST):
         """Scrape un flux RSS spécifique"""
-        articles = self.rss_parser.parse_feed(rss_url)
+        with self.stats.timer('rss_parse', site_domain):
+            articles = self.rss_parser.parse_feed(rss_url)
+        articles = self._new_articles(articles)
         
         for article in articles:
-            self.stats['total'] += 1
+            self._count('total', article, site_domain)
             
             try:
-                # Tente d'extraire le contenu de la page web
-                content = self.extractor.extract_from_url(article['url'])
-                
-                # Si échec, utilise le contenu RSS
-                if not content or len(content) < Config.MIN_CHARS:
-                    content = self.extractor.extract_from_rss_content(
-                        article['content_html'] or article['summary'],
-                        article['url']
-                    )
-                
-                # Vérifie la qualité du contenu
-                if not content or len(content) < Config.MIN_CHARS:
-                    self.stats['too_short'] += 1
+                # Contenu complet dans le flux : pas de téléchargement de la page
+                content = self._content_from_feed(article, strategy)
+                if content:
+                    self._store_article(article, content, site_domain)
                     continue
-                
-                # Prépare et sauvegarde l'article
-                article_doc = self._create_article_document(
-                    article, content, site_domain
-                )
-                
-                if self.db.save_article(article_doc):
-                    self.stats['saved'] += 1
-                    self.stats['success'] += 1
-                else:
-                    print(f"  [Doublon] {article['url']}")
-                
+                # Tente d'extraire le contenu de la page web
+                with self.stats.timer('page_fetch', site_domain):
+                    response = self.http_client.get(article['url'])
+                if response is None:
+                    self._mark_feed_failed(article)
+                content = self.extractor.extract_from_html(response.text, article['url']) if response else None
+                self._store_article(article, content, site_domain)
             except Exception as e:
-                self.stats['extraction_failed'] += 1
+                self._count('extraction_failed', article, site_domain)
                 print(f"  [Erreur] {article['url']}: {e}")
             
             time.sleep(Config.SLEEP_TIME)
     
+    def _store_article(self, article, content, site_domain):
+        """Complète avec le contenu RSS si besoin, vérifie la longueur et sauvegarde"""
+        # Si échec, utilise le contenu RSS (déjà extrait en stratégie RSS_FIRST)
+        if not content or len(content) < Config.MIN_CHARS:
+            content = article.get('rss_content') or self.extractor.extract_from_rss_content(
+                article['content_html'] or article['summary'],
+                article['url']
+            )
+        
+        # Vérifie la qualité du contenu
+        if not content or len(content) < Config.MIN_CHARS:
+            self._count('too_short', article, site_domain)
+            return
+        
+        # Prépare l'article et le relie à un éventuel original quasi identique
+        article_doc = self._create_article_document(
+            article, content, site_domain
+        )
+        index = self.db.near_duplicates
+        signature, signature_bands = index.fingerprint(content)
+        original = index.find_original(signature, signature_bands)
+        article_doc.update({
+            'minhash': signature,
+            'minhash_bands': signature_bands,
+            'duplicate_of': original
+        })
+        if original:
+            self._count('near_duplicates', article, site_domain)
+            print(f"  [Quasi-doublon] {article_doc['url']} ≈ {original}")
+        else:
+            index.add(signature, signature_bands, article_doc['url'])
+        
+        self.db.save_article(article_doc)
+    
+    def _count(self, field, article, site_domain=None):
+        """Incrémente un compteur global, du domaine et du flux de l'article"""
+        domain = site_domain or get_domain(article['source_feed'])
+        self.stats.incr(field, domain=domain, feed=article['source_feed'])
+        if field == 'extraction_failed':
+            self._mark_feed_failed(article)
+    
+    def _mark_feed_failed(self, article):
+        """Article non récupéré (erreur, page indisponible) : le flux sera relu au prochain run"""
+        self._failed_feeds.add(article['source_feed'])
+    
+    def _on_article_saved(self, article_doc, saved, error):
+        """Met à jour les statistiques au retour d'une écriture groupée"""
+        labels = {'domain': article_doc['site'], 'feed': article_doc['metadata']['source_feed']}
+        if saved:
+            self.stats.incr('saved', **labels)
+            self.stats.incr('success', **labels)
+        elif error:
+            self.stats.incr('extraction_failed', **labels)
+            self._failed_feeds.add(labels['feed'])
+            print(f"  [Erreur] {article_doc['url']}: {error}")
+        else:
+            print(f"  [Doublon] {article_doc['url']}")
+    
+    def _on_articles_flushed(self, count, seconds):
+        """Durée d'un bulk_write d'articles (étape mongo_write)"""
+        self.stats.observe('mongo_write', seconds)
+    
     def _create_article_document(self, article, content, site_domain):
         """Crée le document MongoDB pour l'article"""
         return {
             'site': site_domain,
-            'url': article['url'],
+            'url': article['canonical_url'],
             'title': article['title'],
             'content': content,
             'published_at': article['published_at'],
             'fetched_at': datetime.now(timezone.utc),
             'metadata': {
                 'source_feed': article['source_feed'],
+                'original_url': article['url'],
                 'content_length': len(content)
             }
         }
     
     def _get_domain(self, url):
         """Extrait le domaine d'une URL"""
-        parsed = urlparse(url)
-        return parsed.netloc.replace('www.', '')
+        return get_domain(url)
     
     def _print_summary(self):
         """Affiche le résumé du scraping"""
@@ -404,6 +971,24 @@ class NewsScraper:
         print(f"Sauvegardés: {self.stats['saved']}")
         print(f"Trop courts: {self.stats['too_short']}")
         print(f"Erreurs d'extraction: {self.stats['extraction_failed']}")
+        print(f"Déjà connus (non téléchargés): {self.stats['already_known']}")
+        print(f"Quasi-doublons: {self.stats['near_duplicates']}")
+        print(f"Flux inchangés (304): {self.stats['feeds_not_modified']}")
+        print(f"Contenu complet du flux (page non téléchargée): {self.stats['from_feed']}")
+        
+        report = self.stats.report()
+        if report['latency']:
+            print("\nLatences par étape (moyenne / p95 / max, en s):")
+            for stage, h in report['latency'].items():
+                print(f"  {stage}: {h['mean']:.3f} / {h['p95']} / {h['max']:.3f} ({h['count']} mesures)")
+        slowest = sorted(
+            (d for d in report['domains'] if 'page_fetch' in d['latency']),
+            key=lambda d: d['latency']['page_fetch']['mean'], reverse=True
+        )[:3]
+        if slowest:
+            print("Domaines les plus lents (page_fetch moyen):")
+            for d in slowest:
+                print(f"  {d['domain']}: {d['latency']['page_fetch']['mean']:.3f} s")
 
 
 # ============================================================================
@@ -412,7 +997,31 @@ class NewsScraper:
 
 def main():
     """Point d'entrée du script"""
-    scraper = NewsScraper()
+    parser = argparse.ArgumentParser(description="Scraping des flux RSS de presse.")
+    parser.add_argument(
+        "--engine", choices=["sync", "async"], default=Config.ENGINE,
+        help="sync : séquentiel (requests) ; async : concurrent avec politesse par domaine (httpx)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Moteur sync : nombre de threads d'extraction (SCRAPER_PER_DOMAIN_CONCURRENCY par hôte)"
+    )
+    parser.add_argument(
+        "--extract-processes", type=int, default=EXTRACT_PROCESSES,
+        help="Nombre de processus pour l'extraction trafilatura (0 = dans le thread courant)"
+    )
+    parser.add_argument(
+        "--metrics-json", default=Config.METRICS_JSON,
+        help="Fichier JSON où exporter les métriques du run (en plus de la collection scrape_runs)"
+    )
+    args = parser.parse_args()
+    
+    if args.engine == "async":
+        from src.scraper.async_engine import AsyncNewsScraper
+        scraper = AsyncNewsScraper(extract_processes=args.extract_processes, metrics_json=args.metrics_json)
+    else:
+        scraper = NewsScraper(workers=args.workers, extract_processes=args.extract_processes,
+                              metrics_json=args.metrics_json)
     scraper.scrape_all()
 
 
@@ -0,0 +1,58 @@
+"""
+Canonicalisation des URLs d'articles.
+Deux variantes d'une même page (paramètres de tracking, fragment #xtor,
+slash final, http/https, casse de l'hôte, préfixe www., port par défaut) doivent donner
+la même clé de déduplication.
+"""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Paramètres de tracking supprimés (noms exacts)
+TRACKING_PARAMS = {
+    "xtor", "xts", "xtref", "xtcr",
+    "fbclid", "gclid", "dclid", "msclkid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "ito", "cmp",
+}
+# Paramètres de tracking supprimés (préfixes)
+TRACKING_PREFIXES = ("utm_", "at_", "ns_", "pk_", "mtm_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(param):
+    name = param.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """Retourne la forme canonique d'une URL http(s) ; les autres URLs sont renvoyées telles quelles"""
+    if not url:
+        return url
+    url = url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    # Hôte en minuscules, sans point final, www. ni port par défaut (comme get_domain)
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[len("www."):]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+
+    # Chemin sans slashs multiples ni slash final (sauf la racine)
+    path = "/".join(segment for segment in parts.path.split("/") if segment)
+    path = "/" + path
+
+    # Paramètres de tracking retirés, les autres triés
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(key)
+    ))
+
+    # Le fragment n'identifie pas la page (#xtor=... chez Le Monde) : supprimé
+    return urlunsplit(("https", host, path, query, ""))
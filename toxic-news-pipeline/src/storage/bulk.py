@@ -0,0 +1,97 @@
+"""
+Écritures MongoDB tamponnées.
+Les opérations sont regroupées et envoyées par bulk_write non ordonné dès
+que N opérations sont en attente, ou à l'ajout d'une opération si le dernier
+envoi date de plus de T millisecondes (aucun timer : le délai n'est vérifié
+qu'à l'ajout, l'appelant vide le reste avec flush()) ; le résultat de chaque
+document (inséré, déjà présent, doublon, erreur) est remonté par callback,
+et la durée de chaque bulk_write par on_flush(nb_opérations, secondes).
+"""
+
+import os
+import time
+import threading
+from typing import Any, Callable, Optional
+
+from pymongo import InsertOne, UpdateOne, errors
+
+BULK_BATCH_SIZE = int(os.getenv("MONGO_BULK_SIZE", "500"))
+BULK_FLUSH_MS = int(os.getenv("MONGO_BULK_FLUSH_MS", "1000"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Résultats possibles d'une opération
+INSERTED = "inserted"    # InsertOne réussi ou upsert ayant créé le document
+MATCHED = "matched"      # Upsert sur un document déjà présent
+DUPLICATE = "duplicate"  # Violation d'index unique
+ERROR = "error"          # Toute autre erreur
+
+
+class BulkWriter:
+    """Tampon d'opérations MongoDB vidé par bulk_write(ordered=False)."""
+
+    def __init__(self, collection, on_result: Optional[Callable[[Any, str, Optional[str]], None]] = None,
+                 batch_size: int = BULK_BATCH_SIZE, flush_interval_ms: int = BULK_FLUSH_MS,
+                 on_flush: Optional[Callable[[int, float], None]] = None):
+        self.collection = collection
+        self.on_result = on_result
+        self.on_flush = on_flush
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def insert(self, document, context: Any = None):
+        self.add(InsertOne(document), context)
+
+    def upsert(self, filter_, update, context: Any = None):
+        self.add(UpdateOne(filter_, update, upsert=True), context)
+
+    def add(self, operation, context: Any = None):
+        """Ajoute une opération ; vide le tampon si la taille ou le délai (vérifié ici seulement) est atteint."""
+        with self._lock:
+            self._buffer.append((operation, context))
+            due = (len(self._buffer) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Envoie les opérations en attente et notifie le résultat de chacune."""
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        failed, upserted = {}, set()
+        start = time.perf_counter()
+        try:
+            result = self.collection.bulk_write([op for op, _ in pending], ordered=False)
+            upserted = set(result.upserted_ids or {})
+        except errors.BulkWriteError as e:
+            failed = {err["index"]: err for err in e.details.get("writeErrors", [])}
+            upserted = {u["index"] for u in e.details.get("upserted", [])}
+        except errors.PyMongoError as e:
+            failed = {i: {"code": None, "errmsg": str(e)} for i in range(len(pending))}
+        if self.on_flush is not None:
+            self.on_flush(len(pending), time.perf_counter() - start)
+
+        if self.on_result is None:
+            return
+        for i, (operation, context) in enumerate(pending):
+            if i in failed:
+                err = failed[i]
+                outcome = DUPLICATE if err.get("code") == DUPLICATE_KEY_ERROR else ERROR
+                self.on_result(context, outcome, err.get("errmsg"))
+            elif isinstance(operation, InsertOne) or i in upserted:
+                self.on_result(context, INSERTED, None)
+            else:
+                self.on_result(context, MATCHED, None)
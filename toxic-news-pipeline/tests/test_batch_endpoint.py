@@ -0,0 +1,46 @@
+"""
+/predict/batch : messages d'erreur par ligne d'un upload NDJSON.
+Le classifieur est remplacé par un module factice (pas de chargement du modèle).
+"""
+import importlib
+import json
+import sys
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = types.ModuleType("src.models.classifier")
+
+    class ToxicityClassifier:
+        def __init__(self, cache=None):
+            pass
+
+        def predict_many(self, texts, batch_size=None):
+            return [{"prediction": "non-toxic", "confidence": 0.9, "per_label": {}} for _ in texts]
+
+    fake.ToxicityClassifier = ToxicityClassifier
+    fake.MODEL_NAME = "fake"
+    fake.ARTICLE_THRESHOLD = 0.5
+    monkeypatch.setitem(sys.modules, "src.models.classifier", fake)
+    monkeypatch.setenv("TOXIC_CACHE", "none")
+    monkeypatch.delitem(sys.modules, "src.api.app", raising=False)
+    app_module = importlib.import_module("src.api.app")
+    # Sans "with" : pas de lifespan, donc ni batcher ni MongoDB ; seules les
+    # lignes invalides (jamais envoyées au modèle) sont testées ici.
+    return TestClient(app_module.app)
+
+
+def test_ndjson_schema_violation_is_reported_as_invalid_item(client):
+    body = b'{"text": ""}\n{"title": "sans texte"}\n{not json\n'
+    response = client.post(
+        "/predict/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert lines[0]["error"].startswith("Invalid item: ")
+    assert lines[1]["error"].startswith("Invalid item: ")
+    assert lines[2]["error"].startswith("Invalid JSON line: ")
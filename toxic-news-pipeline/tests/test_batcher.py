@@ -0,0 +1,40 @@
+"""
+PredictionBatcher : arrêt pendant le regroupement d'un lot.
+"""
+import asyncio
+
+import pytest
+
+from src.api.batcher import PredictionBatcher
+
+
+def test_stop_fails_callers_of_a_batch_being_collected():
+    async def scenario():
+        # max_wait long : le collecteur est encore en train de compléter le lot
+        batcher = PredictionBatcher(lambda texts: texts, max_batch=8, max_wait_ms=10_000)
+        batcher.start()
+        caller = asyncio.create_task(batcher.predict("x1"))
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.wait_for(caller, timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_batch_is_scored_in_one_call():
+    calls = []
+
+    def predict_many(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    async def scenario():
+        batcher = PredictionBatcher(predict_many, max_batch=8, max_wait_ms=20)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.predict(t) for t in ("a", "b", "c")))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
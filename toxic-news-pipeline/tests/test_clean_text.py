@@ -0,0 +1,63 @@
+"""
+clean_text (NoiseFilter) doit produire exactement la sortie de l'ancienne
+implémentation (une regex par pattern), y compris pour des règles de site
+avec alternatives, drapeaux en ligne ou groupes nommés.
+"""
+import re
+
+import pytest
+
+from src.scraper.bench_clean_text import legacy_clean_text
+from src.scraper.scrape import ContentExtractor
+
+EXTRA_RULES = [
+    r"Partager|Imprimer",
+    r"^Abonnez-vous.*$|^Inscrivez-vous.*$",
+    r"^Newsletter|Offre spéciale",
+    r"(?i)^pour aller plus loin",
+    r"(?P<video>Vidéo) :",
+    r"[|] Photo",
+    r"\d+ commentaires?$",
+]
+
+LINES = [
+    "Le gouvernement a présenté mardi sa réforme.",
+    "Publicité",
+    "Partager",
+    "Imprimer",
+    "Cliquez pour imprimer l'article",
+    "Abonnez-vous pour lire la suite",
+    "Inscrivez-vous à notre newsletter",
+    "Nous vous invitons à vous inscrire",
+    "Newsletter du matin",
+    "Découvrez notre offre spéciale",
+    "Pour aller plus loin",
+    "POUR ALLER PLUS LOIN : le dossier",
+    "Vidéo : le discours du ministre",
+    "Légende | Photo AFP",
+    "12 commentaires",
+    "Temps de lecture : 3 min",
+    "Lire aussi : la réforme des retraites",
+    "-",
+    "   ",
+    "",
+    "Article réservé aux abonnés",
+    "Fin de l'article.",
+]
+
+
+def _text(seed):
+    rotated = LINES[seed % len(LINES):] + LINES[:seed % len(LINES)]
+    return "\n".join(f"  {line}  " if i % 3 else line for i, line in enumerate(rotated))
+
+
+@pytest.mark.parametrize("site", [None, "lemonde.fr", "example.org"])
+def test_clean_text_matches_legacy(site):
+    extractor = ContentExtractor(http_client=None)
+    extractor.register_noise_patterns("example.org", EXTRA_RULES)
+    patterns = ContentExtractor.NOISE_PATTERNS + extractor.site_patterns.get(site, [])
+    compiled = [re.compile(p, re.IGNORECASE) for p in patterns]
+
+    for seed in range(len(LINES)):
+        text = _text(seed)
+        assert extractor.clean_text(text, site=site) == legacy_clean_text(text, compiled)
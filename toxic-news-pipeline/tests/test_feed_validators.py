@@ -0,0 +1,107 @@
+"""
+GET conditionnel des flux : les validateurs (ETag) d'un flux ne sont enregistrés
+que si tous ses articles ont été récupérés. MongoDB est simulé par mongomock.
+"""
+import feedparser
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from src.scraper import scrape
+
+FEED_URL = "https://www.site.fr/rss.xml"
+ARTICLE_URL = "https://site.fr/a/1"
+PAGE = "<html><body><article>" + "".join(
+    f"<p>Paragraphe {i} de l'article, avec assez de texte pour passer le seuil de longueur.</p>"
+    for i in range(20)
+) + "</article></body></html>"
+
+
+class FeedServer:
+    """Flux à un article, ETag "v1" ; répond 304 à un client qui envoie cet ETag"""
+
+    def __init__(self):
+        self.etags_received = []
+
+    def parse(self, url, etag=None, modified=None):
+        self.etags_received.append(etag)
+        if etag == '"v1"':
+            return feedparser.FeedParserDict(status=304, entries=[])
+        entry = feedparser.FeedParserDict(link=ARTICLE_URL, title="Titre", summary="Court.")
+        return feedparser.FeedParserDict(status=200, etag='"v1"', entries=[entry])
+
+
+class Page:
+    text = PAGE
+
+
+@pytest.fixture
+def run(monkeypatch):
+    client = mongomock.MongoClient()
+    server = FeedServer()
+    monkeypatch.setattr(scrape, "MongoClient", lambda uri: client)
+    monkeypatch.setattr(scrape, "RSS_SOURCES", {"https://www.site.fr/": [FEED_URL]})
+    monkeypatch.setattr(scrape.feedparser, "parse", server.parse)
+    monkeypatch.setattr(scrape.Config, "SLEEP_TIME", 0)
+
+    def run(page):
+        scraper = scrape.NewsScraper(extract_processes=0, metrics_json=None)
+        scraper.http_client.get = lambda url: page
+        scraper.scrape_all()
+        return scraper
+
+    run.server = server
+    run.db = client[scrape.Config.MONGO_DB]
+    return run
+
+
+def test_unavailable_page_keeps_feed_unvalidated(run):
+    # Run 1 : la page répond 503 après relances (HTTPClient.get renvoie None)
+    run(page=None)
+    assert run.db["feed_state"].count_documents({}) == 0
+
+    # Run 2 : pas d'ETag envoyé, donc pas de 304 ; l'article est récupéré
+    run(page=Page())
+    assert run.server.etags_received == [None, None]
+    assert run.db["articles"].count_documents({"url": ARTICLE_URL}) == 1
+    assert run.db["feed_state"].find_one({"_id": FEED_URL})["etag"] == '"v1"'
+
+    # Run 3 : flux validé, le serveur répond 304
+    scraper = run(page=Page())
+    assert run.server.etags_received[-1] == '"v1"'
+    assert scraper.stats['feeds_not_modified'] == 1
+
+
+def test_async_feed_error_only_fails_its_feed(run, monkeypatch):
+    from src.scraper import async_engine
+    from src.scraper.async_engine import AsyncNewsScraper
+
+    other_feed = "https://www.site.fr/autre.xml"
+    monkeypatch.setattr(async_engine, "RSS_SOURCES", {"https://www.site.fr/": [FEED_URL, other_feed]})
+    rss = b"""<rss version="2.0"><channel><title>t</title>
+<item><title>Titre</title><link>https://site.fr/a/1</link><description>Court.</description></item>
+</channel></rss>"""
+
+    class Response:
+        status_code = 200
+        headers = {"etag": '"v1"'}
+        content = rss
+        text = PAGE
+
+    async def fetch(self, client, url, headers=None):
+        if url == other_feed:
+            raise RuntimeError("connexion réinitialisée")
+        return Response()
+
+    async def request(self, client, url, headers=None):
+        return Response()
+
+    monkeypatch.setattr(AsyncNewsScraper, "_fetch", fetch)
+    monkeypatch.setattr(AsyncNewsScraper, "_request", request)
+    scraper = AsyncNewsScraper(extract_processes=0, metrics_json=None)
+    scraper.scrape_all()
+
+    assert scraper._failed_feeds == {other_feed}
+    assert run.db["articles"].count_documents({"url": ARTICLE_URL}) == 1
+    assert [doc["_id"] for doc in run.db["feed_state"].find()] == [FEED_URL]
+    assert run.db["scrape_runs"].count_documents({}) == 1
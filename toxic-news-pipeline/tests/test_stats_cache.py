@@ -0,0 +1,65 @@
+"""
+StatisticsCache : le document est relu après l'ouverture du change stream,
+au démarrage comme à chaque reconnexion (aucune écriture manquée entre les deux).
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from pymongo.errors import AutoReconnect
+
+from src.api.stats_cache import StatisticsCache
+
+
+class FakeStream:
+    def __init__(self, log, fail):
+        self.log = log
+        self.fail = fail
+
+    async def __aenter__(self):
+        self.log.append("watch")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.fail:
+            raise AutoReconnect("connection lost")
+        await asyncio.sleep(3600)
+
+
+class FakeStatistics:
+    """Collection statistics : le premier flux est coupé, le second reste ouvert"""
+
+    def __init__(self):
+        self.log = []
+        self.watches = 0
+
+    async def create_index(self, key):
+        pass
+
+    async def find_one(self, *args, **kwargs):
+        self.log.append("find_one")
+        return {"_id": len(self.log), "statistics": {}, "computed_at": datetime.now(timezone.utc)}
+
+    def watch(self, pipeline):
+        self.watches += 1
+        return FakeStream(self.log, fail=self.watches == 1)
+
+
+def test_refresh_follows_each_stream_opening():
+    async def scenario():
+        collection = FakeStatistics()
+        cache = StatisticsCache(collection, poll_interval=0.01)
+        await cache.start()
+        assert cache.snapshot is not None
+        while collection.watches < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        await cache.stop()
+        return collection.log
+
+    assert asyncio.run(scenario()) == ["watch", "find_one", "watch", "find_one"]
@@ -0,0 +1,47 @@
+"""
+Canonicalisation des URLs et migration des articles déjà stockés.
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from src.scraper.urls import canonicalize_url
+
+WWW_VARIANT = "https://www.site.fr/a/1#xtor=RSS"
+BARE_VARIANT = "http://site.fr/a/1/"
+
+
+@pytest.mark.parametrize("url", [
+    WWW_VARIANT,
+    BARE_VARIANT,
+    "https://WWW.Site.fr./a//1?utm_source=rss",
+    "https://site.fr:443/a/1",
+])
+def test_variants_share_the_canonical_url(url):
+    assert canonicalize_url(url) == "https://site.fr/a/1"
+
+
+def test_www_is_only_stripped_as_a_prefix():
+    assert canonicalize_url("https://news.www.site.fr/a") == "https://news.www.site.fr/a"
+
+
+def test_migration_collapses_www_and_bare_host_duplicates(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    from src.scraper import migrate_urls
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(migrate_urls, "MongoClient", lambda uri: client)
+    db = client[migrate_urls.Config.MONGO_DB]
+    db["articles"].insert_many([
+        {"url": WWW_VARIANT, "fetched_at": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        {"url": BARE_VARIANT, "fetched_at": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+    ])
+    db["predictions"].insert_many([{"url": WWW_VARIANT}, {"url": BARE_VARIANT}])
+
+    stats = migrate_urls.migrate()
+
+    assert stats["duplicates_removed"] == 1
+    assert [doc["url"] for doc in db["articles"].find()] == ["https://site.fr/a/1"]
+    # Le plus ancien est conservé
+    assert db["articles"].find_one()["metadata"]["original_url"] == WWW_VARIANT
+    assert [doc["url"] for doc in db["predictions"].find()] == ["https://site.fr/a/1"]